@@ -0,0 +1,74 @@
+# asset_cache.py
+# Images scaled to the window size, saved so later starts skip decoding and scaling them
+# Decoding the map JPEGs and scaling them to the window takes most of the map's startup. The scaled pixels are
+# saved raw in ASSET_DIR, named after the source file's name, a hash of its contents and the size, and read
+# back with pygame.image.frombytes. Editing an image changes its hash, so its old scaled copies are never used
+# again (and are deleted when the new one is saved).
+#
+# 18-oct-2026   Created
+
+import hashlib
+import os
+
+import pygame
+
+ASSET_DIR = 'asset_cache'
+ASSET_VERSION = 1
+
+# pygame.image.tostring/fromstring were renamed tobytes/frombytes in pygame 2.1.3
+_tobytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+_frombytes = getattr(pygame.image, 'frombytes', None) or pygame.image.fromstring
+
+
+def file_hash(filename):
+    h = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def asset_prefix(filename):
+    return os.path.basename(filename) + '-'
+
+
+def asset_name(filename, source_hash, size, alpha):
+    pixel_format = 'RGBA' if alpha else 'RGB'
+    return f"{asset_prefix(filename)}{source_hash[:20]}-{size[0]}x{size[1]}-{pixel_format}-v{ASSET_VERSION}.raw"
+
+
+def load_scaled(filename, size, alpha=False, cache_dir=ASSET_DIR):
+    # Image file scaled to size (width, height), converted to the display's format (with per pixel alpha if
+    # alpha), from cache_dir if it has been scaled to that size before. The display mode must already be set
+    size = (int(size[0]), int(size[1]))
+    pixel_format = 'RGBA' if alpha else 'RGB'
+    source_hash = file_hash(filename)
+    cache_name = os.path.join(cache_dir, asset_name(filename, source_hash, size, alpha))
+
+    try:
+        with open(cache_name, 'rb') as f:
+            image = _frombytes(f.read(), size, pixel_format)
+    except (OSError, ValueError):
+        image = pygame.transform.scale(pygame.image.load(filename), size)
+        save_scaled(cache_name, image, pixel_format, filename, source_hash)
+
+    return image.convert_alpha() if alpha else image.convert()
+
+
+def save_scaled(cache_name, image, pixel_format, filename, source_hash):
+    # Written to a temporary file and renamed, so a partly written file is never read. Copies scaled from
+    # other versions of the source file are deleted
+    cache_dir = os.path.dirname(cache_name)
+    tmp_name = cache_name + '.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_name, 'wb') as f:
+            f.write(_tobytes(image, pixel_format))
+        os.replace(tmp_name, cache_name)
+
+        prefix = asset_prefix(filename)
+        for name in os.listdir(cache_dir):
+            if name.startswith(prefix) and not name.startswith(prefix + source_hash[:20]):
+                os.unlink(os.path.join(cache_dir, name))
+    except OSError:
+        pass    # Saving is only an optimisation
@@ -6,16 +6,390 @@
 # 2 25544  51.6473 245.1182 0001968  95.8013 325.6569 15.49119345257812
 #
 # 13-jan-2023   Cache the stations file to avoid excessive requests to this rate limited service
+# 18-oct-2026   Index the stations file by name and catalogue number (TleCatalog), persisted in a sidecar file
+# 18-oct-2026   Conditional (ETag/Last-Modified) fetch on a pooled session, atomic writes and jittered backoff
+# 18-oct-2026   TLE history (TleHistory) of every fetched element set, searchable by epoch
+# 18-oct-2026   Failed refreshes of a cached file reported to the caller (TLE.fetch_error) instead of printed
 
+import json
 import os
+import random
 import requests
+import tempfile
+import threading
 import time
+from bisect import bisect_left
 from datetime import datetime, timedelta
-from itertools import islice
 from dataclasses import dataclass, field
 
 STATIONS_URL = 'https://celestrak.com/NORAD/elements/stations.txt'
 LOCAL_FILE = 'stations.txt'
+INDEX_SUFFIX = '.idx'		# Sidecar index saved alongside the TLE file, e.g. stations.txt.idx
+META_SUFFIX = '.meta'		# ETag/Last-Modified of the cached copy and when the server was last checked
+HISTORY_FILE = 'tle_history.txt'	# Every element set fetched, in standard two line format
+
+MAXIMUM_AGE = 86400			# Re-check the server once a day (seconds)
+REQUEST_TIMEOUT = (5, 30)	# Connect, read timeouts (seconds)
+MAX_RETRIES = 4
+BACKOFF_BASE = 2.0			# Backoff before retry n is random between 0 and BACKOFF_BASE * 2^n seconds...
+BACKOFF_MAX = 60.0			# ...capped at this
+RETRY_STATUS = (403, 429, 500, 502, 503, 504)	# CelesTrak answers 403 when requests are too frequent
+
+
+class TleFetchError(Exception):
+	pass
+
+
+class StaleTleError(TleFetchError):
+	# The fetch failed, but a stale cached copy is there to use
+	pass
+
+
+_session = None
+
+
+def get_session():
+	# One pooled session for all requests, so connections are reused
+	global _session
+	if _session is None:
+		_session = requests.Session()
+		adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+		_session.mount('https://', adapter)
+		_session.mount('http://', adapter)
+	return _session
+
+
+def read_meta(filename):
+	try:
+		with open(filename + META_SUFFIX, 'r') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def write_atomic(filename, data):
+	# Write to a temporary file in the same directory, then rename over the target
+	# so a crash part way through never leaves a truncated file behind
+	directory = os.path.dirname(os.path.abspath(filename))
+	fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename), suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'wb') as f:
+			f.write(data)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp_name, filename)
+	except BaseException:
+		if os.path.exists(tmp_name):
+			os.remove(tmp_name)
+		raise
+
+
+def cache_age(filename):
+	# Seconds since the server was last checked for this file (or since it was written), None if no cached copy
+	if not os.path.exists(filename) or os.stat(filename).st_size == 0:
+		return None
+	checked = read_meta(filename).get('checked', os.stat(filename).st_mtime)
+	return time.time() - checked
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE):
+	# Full jitter exponential backoff, but never sooner than the server's Retry-After
+	delay = random.uniform(0, min(BACKOFF_MAX, base * 2 ** attempt))
+	if retry_after is not None and retry_after.isdigit():
+		delay = max(delay, min(BACKOFF_MAX, float(retry_after)))
+	return delay
+
+
+def fetch_tle_file(url=STATIONS_URL, filename=LOCAL_FILE, session=None, timeout=REQUEST_TIMEOUT,
+				   retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+	# Conditionally download url to filename. Returns True if the file was updated, False if not modified (304)
+	session = session if session else get_session()
+
+	meta = read_meta(filename)
+	headers = {}
+	if os.path.exists(filename):
+		if meta.get('etag'):
+			headers['If-None-Match'] = meta['etag']
+		if meta.get('last_modified'):
+			headers['If-Modified-Since'] = meta['last_modified']
+
+	error = None
+	retry_after = None
+	for attempt in range(retries + 1):
+		if attempt > 0:
+			time.sleep(backoff_delay(attempt - 1, retry_after, backoff))
+
+		retry_after = None
+		try:
+			resp = session.get(url, headers=headers, timeout=timeout)
+		except requests.RequestException as e:
+			error = e
+			continue
+
+		if resp.status_code == 304:
+			meta['checked'] = time.time()
+			write_atomic(filename + META_SUFFIX, json.dumps(meta).encode())
+			return False
+
+		if resp.status_code == 200 and resp.content:
+			write_atomic(filename, resp.content)
+			meta = {'etag': resp.headers.get('ETag'), 'last_modified': resp.headers.get('Last-Modified'),
+					'checked': time.time()}
+			write_atomic(filename + META_SUFFIX, json.dumps(meta).encode())
+			return True
+
+		error = f"HTTP {resp.status_code}"
+		if resp.status_code not in RETRY_STATUS:
+			break
+		retry_after = resp.headers.get('Retry-After')
+
+	raise TleFetchError(f"Unable to fetch {url}: {error}")
+
+
+def refresh_tle_file(url=STATIONS_URL, filename=LOCAL_FILE, maximum_age=MAXIMUM_AGE):
+	# Make sure there is a cached copy no older than maximum_age. If the fetch fails StaleTleError is raised when
+	# there is an older copy to fall back on (it's left as it was), TleFetchError when there isn't
+	age = cache_age(filename)
+	if age is not None and age <= maximum_age:
+		return False
+
+	try:
+		fetched = fetch_tle_file(url, filename)
+		if fetched:
+			get_history().append_file(filename)
+		return fetched
+	except TleFetchError as e:
+		if age is None:
+			raise
+		raise StaleTleError(f"{e}, using cached {filename}") from e
+
+
+def _catnum_key(catnum):
+	# NORAD catalogue numbers are zero padded in the TLE ("00005"), so normalise to match ints or strings
+	catnum = str(catnum).strip()
+	return str(int(catnum)) if catnum.isdigit() else catnum
+
+
+class TleCatalog:
+	# Index of a TLE file by satellite name and NORAD catalogue number
+	# The file is parsed once and the byte offset of each element set is saved to a sidecar index (JSON)
+	# which is only rebuilt when the TLE file's mtime or size changes, so lookups don't rescan the file
+
+	def __init__(self, filename=LOCAL_FILE, index_filename=None):
+		self.filename = filename
+		self.index_filename = index_filename if index_filename else filename + INDEX_SUFFIX
+		self.file_key = None
+		self.by_name = {}
+		self.by_catnum = {}
+		self.refresh()
+
+	def refresh(self):
+		# Reload the index if the TLE file has changed since it was last read
+		file_stat = os.stat(self.filename)
+		file_key = [file_stat.st_mtime_ns, file_stat.st_size]
+		if file_key == self.file_key:
+			return False
+
+		if not self.load_index(file_key):
+			self.build_index()
+			self.save_index(file_key)
+		self.file_key = file_key
+		return True
+
+	def load_index(self, file_key):
+		try:
+			with open(self.index_filename, 'r') as f:
+				index = json.load(f)
+		except (OSError, ValueError):
+			return False
+
+		if index.get('file_key') != file_key:
+			return False
+
+		self.by_name = index['by_name']
+		self.by_catnum = index['by_catnum']
+		return True
+
+	def save_index(self, file_key):
+		index = {'file_key': file_key, 'by_name': self.by_name, 'by_catnum': self.by_catnum}
+		try:
+			with open(self.index_filename, 'w') as f:
+				json.dump(index, f)
+		except OSError:
+			pass	# Index is only an optimisation, carry on without it
+
+	def build_index(self):
+		# Single pass over the file: a name line (optional) followed by lines "1 ..." and "2 ..."
+		self.by_name = {}
+		self.by_catnum = {}
+		name = None
+		offset = 0
+		prev_line, prev_offset = '', 0
+
+		with open(self.filename, 'rb') as infile:
+			for raw in infile:
+				line = raw.decode('utf-8', errors='replace').strip()
+				if line.startswith('2 ') and prev_line.startswith('1 '):
+					catnum = _catnum_key(prev_line[2:7])
+					self.by_catnum.setdefault(catnum, prev_offset)
+					self.by_name.setdefault(name if name else catnum, prev_offset)
+					name = None
+				elif line and not line.startswith('1 '):
+					name = line
+				prev_line, prev_offset = line, offset
+				offset += len(raw)
+
+	def __len__(self):
+		return len(self.by_catnum)
+
+	def __contains__(self, key):
+		return self.offset_of(key) is not None
+
+	def offset_of(self, key):
+		offset = self.by_name.get(str(key).strip())
+		if offset is None:
+			offset = self.by_catnum.get(_catnum_key(key))
+		return offset
+
+	def lookup(self, key):
+		# Return (line1, line2) for a satellite name or catalogue number, or None if not in the catalog
+		offset = self.offset_of(key)
+		if offset is None:
+			return None
+
+		with open(self.filename, 'rb') as infile:
+			infile.seek(offset)
+			line1 = infile.readline().decode('utf-8').strip()
+			line2 = infile.readline().decode('utf-8').strip()
+		return line1, line2
+
+
+_catalogs = {}
+
+
+def get_catalog(filename=LOCAL_FILE):
+	# Shared catalog per file, re-indexed only when the file changes
+	catalog = _catalogs.get(filename)
+	if catalog is None:
+		catalog = _catalogs[filename] = TleCatalog(filename)
+	else:
+		catalog.refresh()
+	return catalog
+
+
+def tle_epoch(line1):
+	# Epoch (UTC) from columns 19-32 of line 1: two digit year (57-99 = 19xx) and fractional day of year
+	yy = int(line1[18:20])
+	year = 1900 + yy if yy >= 57 else 2000 + yy
+	decimal_days = float(line1[20:32])
+	return datetime(year, 1, 1) + timedelta(decimal_days - 1)
+
+
+def tle_epoch_jd(line1):
+	# Epoch as a Julian date (UTC), directly comparable with skyfield's Time.ut1 / Time.tt to well under a minute
+	return (tle_epoch(line1) - datetime(2000, 1, 1, 12)).total_seconds() / 86400 + 2451545.0
+
+
+class TleHistory:
+	# Append-only history of element sets, stored as a standard two line element file.
+	# An in-memory index of (epoch, file offset) per catalogue number is kept sorted by epoch,
+	# so the element set closest to any time is found with a bisect and a single seek.
+
+	def __init__(self, filename=HISTORY_FILE):
+		self.filename = filename
+		self.lock = threading.Lock()
+		self.epochs = {}		# catnum -> sorted list of epoch Julian dates
+		self.offsets = {}		# catnum -> file offsets of line 1, in the same order as epochs
+		self.load()
+
+	def load(self):
+		self.epochs, self.offsets = {}, {}
+		if not os.path.exists(self.filename):
+			return
+
+		offset = 0
+		with open(self.filename, 'rb') as infile:
+			for raw in infile:
+				line = raw.decode('utf-8', errors='replace')
+				if line.startswith('1 '):
+					self._insert(_catnum_key(line[2:7]), tle_epoch_jd(line), offset)
+				offset += len(raw)
+
+	def _insert(self, catnum, epoch, offset):
+		# Returns False if an element set with this epoch is already recorded
+		epochs = self.epochs.setdefault(catnum, [])
+		offsets = self.offsets.setdefault(catnum, [])
+		i = bisect_left(epochs, epoch)
+		if i < len(epochs) and epochs[i] == epoch:
+			return False
+		epochs.insert(i, epoch)
+		offsets.insert(i, offset)
+		return True
+
+	def __len__(self):
+		return sum(len(e) for e in self.epochs.values())
+
+	def add(self, line1, line2):
+		self.add_many([(line1, line2)])
+
+	def add_many(self, element_sets):
+		# Append element sets not already in the history
+		with self.lock:
+			with open(self.filename, 'ab') as f:
+				offset = f.tell()
+				for line1, line2 in element_sets:
+					if not self._insert(_catnum_key(line1[2:7]), tle_epoch_jd(line1), offset):
+						continue
+					data = f"{line1.strip()}\n{line2.strip()}\n".encode()
+					f.write(data)
+					offset += len(data)
+
+	def append_file(self, tle_filename):
+		# Add every element set in a (two or three line) TLE file
+		element_sets = []
+		prev = ''
+		with open(tle_filename, 'r', encoding='utf-8', errors='replace') as infile:
+			for line in infile:
+				line = line.strip()
+				if line.startswith('2 ') and prev.startswith('1 '):
+					element_sets.append((prev, line))
+				prev = line
+		self.add_many(element_sets)
+
+	def closest_offset(self, catnum, jd):
+		# File offset of the element set for catnum with epoch closest to Julian date jd, None if none recorded
+		catnum = _catnum_key(catnum)
+		with self.lock:
+			epochs = self.epochs.get(catnum)
+			if not epochs:
+				return None
+			i = bisect_left(epochs, jd)
+			if i == len(epochs) or (i > 0 and jd - epochs[i - 1] <= epochs[i] - jd):
+				i -= 1
+			return self.offsets[catnum][i]
+
+	def closest(self, catnum, jd):
+		# (line1, line2) of the element set for catnum with epoch closest to Julian date jd, None if none recorded
+		offset = self.closest_offset(catnum, jd)
+		return None if offset is None else self.read(offset)
+
+	def read(self, offset):
+		with open(self.filename, 'rb') as infile:
+			infile.seek(offset)
+			line1 = infile.readline().decode('utf-8').strip()
+			line2 = infile.readline().decode('utf-8').strip()
+		return line1, line2
+
+
+_history = None
+
+
+def get_history():
+	global _history
+	if _history is None:
+		_history = TleHistory(HISTORY_FILE)
+	return _history
+
 
 @dataclass
 class TLE:
@@ -24,14 +398,13 @@ class TLE:
 	line2: str = field(init=False)
 	epoch: str = field(init=False)
 	found: bool = False
+	fetch_error: str = field(init=False, default=None)	# Why the cached stations file is stale, if it is
 
 	def __post_init__(self):
 		# self.found, self.line1, self.line2 = self.get_tle()
 		self.get_tle()
 		if self.found:
-			year = 2000 + int(self.line1[18:20])
-			decimal_days = float(self.line1[20:32])
-			epoch = datetime(year, 1, 1) + timedelta(decimal_days - 1)
+			epoch = tle_epoch(self.line1)
 			self.epoch = epoch.strftime("%a %d %b %Y %H:%M:%S")
 
 	def is_valid(self):
@@ -40,46 +413,16 @@ class TLE:
 	def get_tle(self):
 		station_name = self.sat_name
 
-		maximum_age = 86400  # 1 day in seconds
-
-		# Check for cached copy of stations file, which must me
-		# 1. present
-		# 2. newer than maximum_age
-		# 3. non-zero length
-		fetch_required = False
-		if not os.path.exists(LOCAL_FILE):
-			fetch_required = True
-		else:
-			file_stat = os.stat(LOCAL_FILE)
-			modified_time = file_stat.st_mtime
-			file_size = file_stat.st_size
-			now = time.time()
-			if (now - modified_time) > maximum_age or file_size == 0:
-				fetch_required = True
-
-		if fetch_required:
-			resp = requests.get(STATIONS_URL)
-
-			# Save to local file
-			with open(LOCAL_FILE, "wb") as f:
-				f.write(resp.content)
-
-		self.found = False
-
-		with open(LOCAL_FILE, 'r') as infile:
-			while not self.found:
-				# Each entry is 3 lines (includes name on its own line), so go through the list 3 lines at a time
-				tle_data = list(islice(infile, 3))
-				name = tle_data[0].rstrip()
-
-				if name == station_name:
-					self.found = True
-					# Found the required station name, so read the TLE from the next 2 lines
-					self.line1 = tle_data[1].strip()
-					self.line2 = tle_data[2].strip()
-					break
-				if not tle_data:
-					break
-
-		# return found, tle_line1, tle_line2
+		# Check for a cached copy of the stations file, fetching it if missing, empty or older than a day
+		try:
+			refresh_tle_file(STATIONS_URL, LOCAL_FILE)
+		except StaleTleError as e:
+			self.fetch_error = str(e)	# Reported by the caller, which may be a background thread
+
+		tle_lines = get_catalog(LOCAL_FILE).lookup(station_name)
+		self.found = tle_lines is not None
+		if self.found:
+			self.line1, self.line2 = tle_lines
+			get_history().add(self.line1, self.line2)
+
 		return
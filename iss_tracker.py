@@ -5,6 +5,12 @@
 #
 # Martin Bridge, Jun 2021
 # 27-jul-2024	Use python rich instead of curses
+# 18-oct-2026	Refresh the TLE in the background for long running sessions
+# 18-oct-2026	Show the places that can currently see the satellite
+# 18-oct-2026	Place list chosen by name on the command line (-p)
+# 18-oct-2026	Place list reloaded when its file is edited
+# 18-oct-2026	TLE refresh failures shown in the display instead of printed over it
+# 18-oct-2026	Place list reloads (and reload failures) shown in the display too
 
 # Credits:
 # https://celestrak.com/NORAD/elements/stations.txt
@@ -35,7 +41,9 @@ from rich.live import Live
 
 # Local
 from get_tle import TLE
-from places import closest_place_to, latlong
+from place_watcher import PlaceFileWatcher
+from places import DEFAULT_PLACE_LIST, PLACE_LISTS, closest_place_to, footprint_radius_km, latlong, select_place_list, watch_place_list, within_radius
+from sat_refresher import SatelliteRefresher
 
 DEG_PER_RAD = 180.0 / math.pi
 OBSERVER_TITLE = 'London'
@@ -46,12 +54,15 @@ SAT_NAME = 'ISS (ZARYA)'
 # figlet fonts: chunky doom graffiti speed big slant crawford roman  stop univers
 FIGFONTNAME = "slant"
 
+MAX_VISIBLE_NAMES = 5    # Places listed by name as able to see the satellite
+
 ALT_SYM = "Alt:"
 AZ_SYM = "Az:"
 
 
 class DisplayData:
     t: skyfield.timelib.Time
+    tle: TLE
     # Computed for display:
     sat_lat_degrees: float
     sat_lon_degrees: float
@@ -64,6 +75,9 @@ class DisplayData:
     obs_sat_az_degrees: float
     nearest_loc: str
     sat_place_dist_km: float
+    visible_places: list     # (place, distance km) within the satellite's footprint, nearest first
+    refresh_error: str = None    # Why the last background TLE refresh failed, if it did
+    places_message: str = None   # Result of the last reload of the place file, if any
 
 
 @dataclass
@@ -72,11 +86,21 @@ class Tracker:
     observer: Topos
     sat: EarthSatellite
     satdata: DisplayData
+    refresher: SatelliteRefresher = None
+    place_watcher: PlaceFileWatcher = None
 
     def update_sat(self):
+        # Pick up a refreshed TLE/satellite (swapped in by the background refresher) between ticks
+        if self.refresher is not None:
+            self.tle, self.sat = self.refresher.current
+            self.satdata.refresh_error = self.refresher.last_error
+        if self.place_watcher is not None:
+            self.satdata.places_message = self.place_watcher.last_message
+
         t = ts.now()
         self.satdata.t = t
-        geocentric = sat.at(t)
+        self.satdata.tle = self.tle
+        geocentric = self.sat.at(t)
         subpoint = geocentric.subpoint()
 
         self.satdata.sat_lat_degrees = subpoint.latitude.degrees
@@ -84,7 +108,7 @@ class Tracker:
         self.satdata.sat_elev_km = subpoint.elevation.km
 
         # Display value units, degrees & km
-        difference = sat - observer
+        difference = self.sat - self.observer
         topocentric = difference.at(t)
         obs_sat_alt, obs_sat_az, obs_sat_distance = topocentric.altaz()
 
@@ -97,6 +121,10 @@ class Tracker:
         self.satdata.nearest_loc = f"{self.satdata.sat_nearest_place.id}, {self.satdata.sat_nearest_place.name}"
         # self.nearest_with_dist = f"{self.satdata.nearest_loc} ({int(self.satdata.sat_place_dist_km)} km)"
 
+        # Places from which the satellite is above the horizon
+        footprint_km = footprint_radius_km(self.satdata.sat_elev_km)
+        self.satdata.visible_places = within_radius(latlong(self.satdata.sat_lat_degrees, self.satdata.sat_lon_degrees), footprint_km)
+
         # Calculate speed from velocity vector
         v = geocentric.velocity.km_per_s
         self.satdata.speed_kms = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
@@ -110,6 +138,8 @@ class SatDisplay:
     observer_name: str
 
     def __post_init__(self):
+        self.shown_messages = (None, None)  # Refresh error and place reload message last printed (list output)
+
         # Define rich layout
         if output_type == "rich":
             self.layout = Layout(name="screen")
@@ -132,6 +162,9 @@ class SatDisplay:
         ascii_art = figfont.renderText('Satellite Tracker').rstrip()
 
         nearest_with_dist = f"{satdata.nearest_loc} ({int(satdata.sat_place_dist_km)} km)"
+        visible_names = ", ".join(p.id for p, d in satdata.visible_places[:MAX_VISIBLE_NAMES])
+        if len(satdata.visible_places) > MAX_VISIBLE_NAMES:
+            visible_names += f" +{len(satdata.visible_places) - MAX_VISIBLE_NAMES} more"
         speed_kmh = satdata.speed_kms * 3600
         speed_mph = speed_kmh * 0.621371
 
@@ -140,7 +173,13 @@ class SatDisplay:
                   f'Pos: {satdata.sat_lat_degrees:8.4f}, {satdata.sat_lon_degrees:9.4f}   '
                   f'{ALT_SYM} {satdata.obs_sat_alt_degrees:>5.1f}  {AZ_SYM} {satdata.obs_sat_az_degrees:>5.1f}  '
                   f'Ht: {satdata.sat_elev_km:3.0f} km  Range: {satdata.obs_sat_distance_km:5.0f} km  '
-                  f' Nearest: {nearest_with_dist}')
+                  f' Nearest: {nearest_with_dist}  In view: {len(satdata.visible_places)}')
+            messages = (satdata.refresh_error, satdata.places_message)
+            if satdata.refresh_error not in (None, self.shown_messages[0]):
+                print(f"Warning: {satdata.refresh_error}")
+            if satdata.places_message not in (None, self.shown_messages[1]):
+                print(satdata.places_message)
+            self.shown_messages = messages
 
         elif self.output_type == "rich":
             author = "by Martin Bridge"
@@ -151,10 +190,10 @@ class SatDisplay:
 
             # Define the TLE details as a Table
             object_table = Table(show_header=False, show_lines=False, show_edge=False, show_footer=False)
-            object_table.add_row("Object:", sat.name)
-            object_table.add_row("TLE1:", tle.line1)
-            object_table.add_row("TLE2:", tle.line2)
-            object_table.add_row("TLE Epoch:", tle.epoch)
+            object_table.add_row("Object:", satdata.tle.sat_name)
+            object_table.add_row("TLE1:", satdata.tle.line1)
+            object_table.add_row("TLE2:", satdata.tle.line2)
+            object_table.add_row("TLE Epoch:", satdata.tle.epoch)
 
             n = datetime.utcnow()
             nowstr = n.strftime('%a %d %b %Y %H:%M:%S.%f %Z')
@@ -183,8 +222,14 @@ class SatDisplay:
             # Panels
             tle_panel = Panel(object_table, title="Satellite Information", title_align="left", border_style="green")
             obs_panel = Panel(obs_table, title="Observer: London", title_align="left", border_style="cyan")
-            sat_panel = Panel(Columns([sat_table, sat_table2]), title=f"Satellite: {sat.name}", title_align="left", border_style="cyan")
-            status_panel = Panel(Text(nearest_with_dist), title="Nearest Place", title_align="left", border_style="cyan")
+            sat_panel = Panel(Columns([sat_table, sat_table2]), title=f"Satellite: {satdata.tle.sat_name}", title_align="left", border_style="cyan")
+            status_items = [Text(nearest_with_dist), Text(f"In view of: {visible_names or 'none'}", style="dim")]
+            if satdata.refresh_error is not None:
+                status_items.append(Text(satdata.refresh_error, style="bold red"))
+            if satdata.places_message is not None:
+                status_items.append(Text(satdata.places_message, style="dim"))
+            status_panel = Panel(Columns(status_items, expand=True),
+                                 title="Nearest Place", title_align="left", border_style="cyan")
 
             self.layout["header"].update(heading_group)
             self.layout["upper"].update(tle_panel)
@@ -204,11 +249,17 @@ def print_tle(tle):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Satellite Tracker')
     parser.add_argument('-r', '--rich', help='Use rich output on live screen', action='store_true')
+    parser.add_argument('-p', '--places', help=f'Place list [{DEFAULT_PLACE_LIST}]', choices=list(PLACE_LISTS),
+                        default=DEFAULT_PLACE_LIST)
     args = parser.parse_args()
     output_type = "rich" if args.rich else "list"
+    select_place_list(args.places)
+    place_watcher = watch_place_list()
 
     try:
         tle = TLE(SAT_NAME)
+        if tle.fetch_error is not None:
+            print(f"Warning: {tle.fetch_error}")
         display_data = DisplayData()
 
         if not tle.is_valid():
@@ -218,7 +269,10 @@ if __name__ == "__main__":
             sat = EarthSatellite(tle.line1, tle.line2, SAT_NAME, ts)
             observer = Topos(OBSERVER_LAT, OBSERVER_LON, elevation_m=OBSERVER_ELEV)
 
-            tracker = Tracker(tle, observer, sat, display_data)
+            refresher = SatelliteRefresher(tle, ts, sat)
+            refresher.start()
+
+            tracker = Tracker(tle, observer, sat, display_data, refresher, place_watcher)
             display_data = tracker.update_sat()
 
             display = SatDisplay(output_type, OBSERVER_TITLE)
@@ -9,18 +9,49 @@
 # 14-jan-2023   mbridge     Added scaling using window size as a command line parameter
 # 17-jan-2023   mbridge     Added day/night and solar subpoint to map
 # 01-feb-2023   mbridge     Parameters for window width & full screen
+# 18-oct-2026   Background TLE refresh, swapped in between frames
+# 18-oct-2026   Propagate from the TLE history element set closest to the displayed time
+# 18-oct-2026   Places filtered by activation date with ordinal dates (no string compare)
+# 18-oct-2026   Highlight the places that can see the satellite
+# 18-oct-2026   Optional precomputed nearest place raster (--raster)
+# 18-oct-2026   Named place lists: --places on the command line, L switches list while running
+# 18-oct-2026   Place files reloaded when edited, markers updated for just the changed places
+# 18-oct-2026   Orbit track propagated as arrays, cached and extended as time moves on
+# 18-oct-2026   Night shading computed with NumPy, cached and shifted with the Earth's rotation
+# 18-oct-2026   Day and night images blended per pixel by the sun's elevation, with a twilight band
+# 18-oct-2026   Sun's subpoint interpolated from a table, used for the icon and the terminator
+# 18-oct-2026   Only the changed parts of the screen are redrawn and presented (display.update)
+# 18-oct-2026   Rendered text cached per field (LRU), hit/miss counts shown with --debug
+# 18-oct-2026   Markers kept as arrays with a grid for clicks (marker_grid.py), stamped from one image
+# 18-oct-2026   Images scaled once per window size and cached (asset_cache.py), ephemeris loaded when needed
+# 18-oct-2026   Resizable window: layout redrawn for the new size once resizing stops, kept per size
+# 18-oct-2026   Equinoxes no longer found at startup, the terminator uses the sun's subpoint
+# 18-oct-2026   Unused per longitude terminator functions removed (see terminator_rows)
+# 18-oct-2026   Ephemeris loaded and sun table built in the background, night shown once they're ready
+# 18-oct-2026   Rasters for lists loaded while running are built for the start date, like the first
+# 18-oct-2026   TLE refresh failures reported from the main loop
+# 18-oct-2026   Place file reloads reported from the main loop
+# 18-oct-2026   Night shaded black instead of blended with --shade, only the chosen one is set up
 
 import argparse
 import math
 import datetime
+from collections import OrderedDict
+import numpy as np
+import threading
 import time
 import pygame
 from pygame.locals import *
-from skyfield import almanac
 from skyfield.api import load, EarthSatellite, wgs84
-import skyfield.positionlib
 from get_tle import TLE
-from places import closest_place_to, latlong, places
+from places import (DEFAULT_PLACE_LIST, PLACE_LISTS, closest_place_to, date_ordinal, footprint_radius_km,
+                    get_place_list, jd_to_ordinal, latlong, next_place_list_name, select_place_list, use_raster,
+                    watch_place_list, within_radius)
+import places
+from asset_cache import load_scaled
+from marker_grid import MarkerGrid
+from sat_refresher import SatelliteRefresher
+from sun_table import SunTable
 
 DEBUG = False       # Global - switched on with keystroke
 first_obs_time = True   # Allows setting initial date/time
@@ -28,9 +59,11 @@ first_obs_time = True   # Allows setting initial date/time
 DAY_IMAGE = 'earth_day_lrg.jpg'
 NIGHT_IMAGE = 'earth_night_lrg.jpg'
 DISPLAY_NIGHT = True
+NIGHT_BLEND = True      # Blend in the night image (otherwise night is shaded black, --shade)
 
 ISS_IMAGE = "space-station.png"
 SUN_IMAGE = "sun-4-xxl.png"
+EPHEMERIS = 'de421.bsp'     # For Sun calculations
 
 # Geometry of UI components
 icon_size = 50  # Assume square icon
@@ -39,9 +72,19 @@ icon_border_width = 3
 icon_border_color = (0, 255, 0)
 orbit_color_back = (200, 200, 200)
 orbit_color_fwd = (255, 255, 100)
+orbit_increment_mins = 2        # Orbit track: time between points
+orbit_duration_mins = 90        # Orbit track: drawn for this long before and after the satellite
+night_alpha = 100               # Night shading: opacity of the black mask (0-255)
+night_redraw_px = 0.5           # Night shading: redrawn when the terminator has moved this far (pixels) other than by rotation
+twilight_deg = (-6.0, 0.0)      # Night blend: sun elevations where the night image starts and finishes fading out
 marker_color = (240, 55, 128)  # To plot cities/DCs
 marker_outline = (255, 255, 255)
 marker_highlight_color = (240, 240, 20)
+max_highlights = 500    # Most places highlighted as in view of the satellite (nearest first)
+dirty_strip_px = 32     # Width of the column strips that changes to the night shading are redrawn in
+text_cache_size = 64    # Rendered text kept per text field (least recently used dropped first)
+scaled_cache_size = 3   # Window sizes the scaled map layers, markers and text fields are kept for
+resize_delay = 0.3      # Seconds after the last resize event before the layout is redrawn for the new size
 
 # base values are what were used to calculate original layout on an HD screen
 base_w, base_h = 1920, 1080
@@ -81,13 +124,12 @@ info_font = {'name': 'freesans', 'size': 30, 'bold': False, 'color': "black", 'b
 
 # Constants
 two_pi = 2 * math.pi
-pi_over_180 = math.pi / 180.0
-one_eighty_over_pi = 180.0 / math.pi
 
 
 class TextField:
 
-    def __init__(self, surface, x, y, width, height, screen_scale, font, text="", centered=False, vcentered=False):
+    def __init__(self, surface, x, y, width, height, screen_scale, font, text="", centered=False, vcentered=False,
+                 cache_size=text_cache_size):
 
         self.surface = surface  # Surface on which this field is drawn
         self.x = int(x * screen_scale)
@@ -103,9 +145,16 @@ class TextField:
         self.image = pygame.Surface([self.width, self.height])
         self.rect = self.image.get_rect()
         self.font = pygame.font.SysFont(self.font_name, self.font_size, bold=self.bold)
-        self.text = text
+        self.text = ""
         self.centered = centered
         self.vcentered = vcentered
+        self.dirty = None   # Area of the surface drawn since the last take_dirty()
+
+        # Rendered text by value, most recently used last
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         self.image.fill(self.bg_color)
         if text != "":
@@ -113,7 +162,11 @@ class TextField:
         return
 
     def write_text(self, text):
-        text_image = self.font.render(text, True, self.text_color, self.bg_color)
+        # Only drawn if the text has changed
+        if text == self.text:
+            return
+        self.text = text
+        text_image = self.render(text)
 
         bg_rect_x = self.x
         bg_rect_y = self.y
@@ -125,15 +178,37 @@ class TextField:
             self.y = (self.surface.get_height() - text_image.get_height()) / 2
             bg_rect_y = (self.surface.get_height() - self.image.get_height()) / 2
 
-        self.surface.blit(self.image, [bg_rect_x, bg_rect_y])
+        drawn = self.surface.blit(self.image, [bg_rect_x, bg_rect_y])
 
         th = text_image.get_height()
         bgh = self.image.get_height()
 
         y2 = (bgh - th) / 2
-        self.surface.blit(text_image, [self.x, self.y + y2])
+        drawn.union_ip(self.surface.blit(text_image, [self.x, self.y + y2]))
+        self.dirty = drawn if self.dirty is None else self.dirty.union(drawn)
         return
 
+    def render(self, text):
+        # Rendered text, from the cache if it has been shown recently
+        text_image = self.cache.get(text)
+        if text_image is not None:
+            self.cache.move_to_end(text)
+            self.cache_hits += 1
+            return text_image
+
+        self.cache_misses += 1
+        text_image = self.font.render(text, True, self.text_color, self.bg_color)
+        if self.cache_size > 0:
+            self.cache[text] = text_image
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return text_image
+
+    def take_dirty(self):
+        # Area drawn since the last call, None if nothing has been
+        dirty, self.dirty = self.dirty, None
+        return dirty
+
 
 class HeaderSurface:
 
@@ -146,6 +221,7 @@ class HeaderSurface:
         self.surface.fill(self.color)
 
         self.heading_field = TextField(self.surface, 0, 0, wd, ht, screen_scale, header_font, centered=True)
+        self.fields = [self.heading_field]
 
         return
 
@@ -172,27 +248,27 @@ class DataSurface:
         self.long_field = TextField(self.surface, 150, 50, 130, 45, screen_scale, data_font)
         self.alt_field = TextField(self.surface, 300, 50, 130, 45, screen_scale, data_font)
         self.speed_field = TextField(self.surface, 440, 50, 200, 45, screen_scale, data_font)
-        self.time_field = TextField(self.surface, 660, 50, 350, 45, screen_scale, data_font)
+        # The time never repeats, so isn't worth caching
+        self.time_field = TextField(self.surface, 660, 50, 350, 45, screen_scale, data_font, cache_size=0)
         self.place_field = TextField(self.surface, 1015, 50, 680, 45, screen_scale, data_font)
         self.timefactor_field = TextField(self.surface, 1700, 50, 150, 45, screen_scale, data_font)
+        self.fields = [self.lat_field, self.long_field, self.alt_field, self.speed_field, self.time_field,
+                       self.place_field, self.timefactor_field]
 
         return
 
 
-# Place (city) markers
-class Marker(pygame.sprite.Sprite):
-    def __init__(self, id, name, x, y, size):
-        super().__init__()
+def take_dirty_rects(fields):
+    # Areas of their surface redrawn by text fields since the last call
+    return [rect for rect in (field.take_dirty() for field in fields) if rect is not None]
 
-        self.id = id
-        self.name = name
-        self.image = pygame.Surface([size, size])
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
 
-    def display_info(self, text_field):
-        text_field.write_text(f"{self.id}, {self.name:120s}")
+# Map attributes drawn for a particular screen scale (see Map.set_scale)
+scaled_attributes = ('surface', 'rect', 'base', 'drawing_layer', 'day_image', 'night_image', 'day_blend', 'blended',
+                     'row_sin_lat', 'row_cos_lat', 'col_cos_long', 'day_weights', 'day_weights_lat', 'blend_shift',
+                     'night_shade', 'night_shade_rows', 'night_shade_sign', 'night_shade_alpha', 'night_shift',
+                     'night_window', 'marker_half_size', 'marker_image', 'place_layers', 'iss_icon', 'sun_icon',
+                     'clicked_marker_field')
 
 
 class Map:
@@ -200,61 +276,198 @@ class Map:
     def __init__(self, sat, timescale, day_image_name, night_image_name, width, height, screen_scale):
         self.sat = sat
         self.ts = timescale
+        self.day_image_name = day_image_name
+        self.night_image_name = night_image_name
+        self.unscaled_size = (width, height)
 
-        # Clickable markers (cities)
-        self.markers = pygame.sprite.Group()
+        # Orbit track points, kept between frames: (satellite, number of the first sample, lats, longs)
+        # Sample n is at TT Julian date n / samples per day, so the same points are reused as time moves on
+        self.orbit_track = None
+
+        # Plot fixed locations defined before given start date (today)
+        today = datetime.date.today()
+        self.places_date = today
+        self.place_loading = set()
+        self.raster_res = None     # Cell size (degrees) of the nearest place raster built for each list, if any
+        self.raster_date = ''      # Date the rasters are built for: the start date (-a), default today
+        self.place_list_name = places.place_list_name
+        self.place_watchers = {}   # List name -> PlaceFileWatcher, for lists read from a file
+        self.show_tropics = False
+
+        # The ephemeris and sun table are loaded in the background when the night is first drawn (see load_sun),
+        # the map is drawn without night until they're ready
+        self.ephemeris = None
+        self.sun_table = None
+        self.sun_loading = False
+
+        # Everything drawn at a scale, for the last few sizes used (see set_scale)
+        self.scaled = OrderedDict()
+        self.width = self.height = None
+        self.set_scale(screen_scale)
+        self.watch_places(self.place_list_name)
+
+        return
 
+    def set_scale(self, screen_scale):
+        # Images, layers, markers and fonts for a screen scale, kept for scaled_cache_size scales so resizing the
+        # window back to a size used before doesn't draw them again
+        if self.width is not None:
+            self.save_scaled()
         self.screen_scale = screen_scale
-        self.width = int(width * self.screen_scale)
-        self.height = int(height * self.screen_scale)
+        self.width = int(self.unscaled_size[0] * self.screen_scale)
+        self.height = int(self.unscaled_size[1] * self.screen_scale)
 
+        scaled = self.scaled.get((self.width, self.height))
+        if scaled is not None:
+            self.scaled.move_to_end((self.width, self.height))
+            self.__dict__.update(scaled)
+        else:
+            self.draw_scaled()
+            self.save_scaled()
+            if len(self.scaled) > scaled_cache_size:
+                self.scaled.popitem(last=False)
+
+        # The current place list, if it was loaded (or reloaded) since this scale was last used
+        if not isinstance(self.place_layers.get(self.place_list_name), tuple):
+            self.place_layers[self.place_list_name] = self.plot_places(get_place_list(self.place_list_name),
+                                                                       self.places_date)
+        self.marker_layer, self.markers = self.place_layers[self.place_list_name]
+        self.clicked_marker_field.write_text("")
+
+        # Drawn again from scratch at the next update
+        self.background = self.day_image
+        self.mask = None
+        self.sun_pos = None             # Top left of the sun icon (None when not shown)
+        self.base_layers = None         # (background, mask shown, marker layer) the base was composed from
+        self.base_sun_pos = None
+        self.base_changes = []          # Areas of the base to compose again at the next update
+        self.overlay_rects = []         # Areas drawn over the base since the last update
+        self.dirty = []                 # Areas of surface changed this frame
+        return
+
+    def save_scaled(self):
+        # Keep the current scale's attributes, as they are now (e.g. the blend weights)
+        self.scaled[(self.width, self.height)] = {name: getattr(self, name) for name in scaled_attributes
+                                                  if hasattr(self, name)}
+        return
+
+    def draw_scaled(self):
+        # Everything in scaled_attributes, for the current width and height
         self.surface = pygame.Surface([self.width, self.height])
+        self.rect = self.surface.get_rect()
+
+        # The map without the overlays (satellite, orbit track, lines and highlights), composed from the
+        # background, night shading, sun, drawing layer and markers. Only the areas that change are composed
+        # again, and each frame's overlays are rubbed out by copying the base back over them (see update)
+        self.base = pygame.Surface([self.width, self.height])
 
         # For the fixed parts of the display (places, tropics, maps)
         self.drawing_layer = pygame.Surface([self.width, self.height], pygame.SRCALPHA, 32)
         # self.drawing_layer = self.drawing_layer.convert_alpha()
+        if self.show_tropics:
+            self.draw_tropics()
+
+        self.day_image = load_scaled(self.day_image_name, [self.width, self.height])
+
+        # Day image blended over the night image, weighted by the sun's elevation (see draw_blend)
+        self.night_image = None
+        if NIGHT_BLEND:
+            self.night_image = load_scaled(self.night_image_name, [self.width, self.height])
+            self.day_blend = self.day_image.convert_alpha()     # Day image, with its alpha set to the day weight
+            self.blended = pygame.Surface([self.width, self.height]).convert()
+
+            # Trig tables: per row (latitude of the row's centre) and per column (longitude)
+            lat = math.pi / 2 - (np.arange(self.height) + 0.5) * math.pi / self.height
+            long = (np.arange(self.width) + 0.5) * two_pi / self.width - math.pi
+            self.row_sin_lat, self.row_cos_lat = np.sin(lat).astype(np.float32), np.cos(lat).astype(np.float32)
+            self.col_cos_long = np.cos(long).astype(np.float32)
+            self.day_weights = None         # Day weight (0-255) for the sun at longitude 0, shape (2 * width, height)
+            self.day_weights_lat = None     # Sun latitude day_weights were calculated for
+            self.blend_shift = None         # Column of day_weights shown at the left of the map in blended
 
-        self.day_image = pygame.image.load(day_image_name).convert()
-        self.day_image = pygame.transform.scale(self.day_image, [self.width, self.height])
-        # self.night_image = pygame.image.load(night_image_name).convert()
-        # self.night_image = pygame.transform.scale(self.night_image, [self.width, self.height])
-
-        # To draw the night shading
-        self.mask = pygame.Surface([self.width, self.height])
+        else:
+            # Night shading, drawn once for the current declination (see draw_night) across two map widths, so
+            # any rotation of the Earth is a window onto it. mask is that window (None when not shown)
+            self.night_shade = pygame.Surface([2 * self.width, self.height], pygame.SRCALPHA, 32)
+            self.night_shade_rows = None    # Terminator row for each column of night_shade when it was drawn
+            self.night_shade_sign = 0       # Sign of the declination it was drawn for
+            self.night_shade_alpha = None   # Its alpha values, to find what changes as it's shifted
+            self.night_shift = None         # Column of night_shade shown at the left of the map in mask
+            self.night_window = None
+
+        # Every place marker is stamped from one image: an outlined circle, radius + line width from its centre
+        radius = int(6 * self.screen_scale)
+        line_width = int(2 * self.screen_scale)
+        self.marker_half_size = radius + line_width
+        self.marker_image = pygame.Surface([2 * self.marker_half_size + 1] * 2, pygame.SRCALPHA, 32)
+        centre = [self.marker_half_size] * 2
+        pygame.draw.circle(self.marker_image, marker_outline, centre, radius + line_width, line_width)
+        pygame.draw.circle(self.marker_image, marker_color, centre, radius, 0)
 
-        # Plot fixed locations defined before given start date (today)
-        today = datetime.date.today()
-        datestr = today.strftime("%Y-%m-%d")
-        self.plot_all_places(on_date=datestr)
+        # Pre-rendered marker layer and clickable markers (cities) for each place list, built on first use
+        self.place_layers = {}     # List name -> (marker layer, markers), or the exception if it failed to load
 
         icon_size_scaled = int(icon_size * self.screen_scale)
 
-        self.iss_icon = pygame.image.load(ISS_IMAGE).convert_alpha()
-        self.iss_icon = pygame.transform.scale(self.iss_icon, (icon_size_scaled, icon_size_scaled))
-
-        self.sun_icon = pygame.image.load(SUN_IMAGE).convert_alpha()
-        self.sun_icon = pygame.transform.scale(self.sun_icon, (icon_size_scaled, icon_size_scaled))
-
-        self.ephemeris = load('de421.bsp')      # For Sun calculations
-
-        year = today.year
-        self.vernal, self.autumnal = self.get_equinoxes(year)
-
-        self.clicked_marker_field = TextField(self.day_image, 10, 0, 600, 50, screen_scale, info_font)
+        self.iss_icon = load_scaled(ISS_IMAGE, (icon_size_scaled, icon_size_scaled), alpha=True)
+        self.sun_icon = load_scaled(SUN_IMAGE, (icon_size_scaled, icon_size_scaled), alpha=True)
 
+        self.clicked_marker_field = TextField(self.drawing_layer, 10, 0, 600, 50, self.screen_scale, info_font)
         return
 
     def update(self):
         # Repaint the image before redrawing all the elements (icon, track etc)
+        # Only the areas of the base that have changed are composed again, then those and last frame's
+        # overlays are copied from the base
+        layers = (self.background, self.mask is not None, self.marker_layer)
+        if layers != self.base_layers:
+            self.base_layers = layers
+            self.base_changes = [self.rect]
+        if self.sun_pos != self.base_sun_pos:
+            for pos in (self.base_sun_pos, self.sun_pos):
+                if pos is not None:
+                    self.base_changes.append(self.sun_icon.get_rect(topleft=pos))
+            self.base_sun_pos = self.sun_pos
+        clicked = self.clicked_marker_field.take_dirty()
+        if clicked is not None:
+            self.base_changes.append(clicked)
+
+        for rect in self.base_changes:
+            self.compose(rect)
+
+        self.dirty = [self.rect] if self.rect in self.base_changes else self.base_changes + self.overlay_rects
+        for rect in self.dirty:
+            self.surface.blit(self.base, rect, rect)
+        self.base_changes, self.overlay_rects = [], []
+        return
 
-        # Update day/night mask
-        # self.surface.blit(self.night_image, [0, 0])
-        self.surface.blit(self.day_image, [0, 0])
-        self.surface.blit(self.mask, [0, 0])
-        self.surface.blit(self.drawing_layer, [0, 0])
+    def dirty_rects(self):
+        # Areas of surface changed this frame: repainted by update and drawn over since
+        # (a track segment drawn in the same place as last frame is only listed once)
+        return list({tuple(rect): rect for rect in self.dirty + self.overlay_rects}.values())
+
+    def compose(self, rect):
+        # Draw an area of the base from its layers
+        self.base.set_clip(rect)
+        self.base.blit(self.background, [0, 0])
+        if self.mask is not None:
+            self.base.blit(self.mask, [0, 0])
+        if self.sun_pos is not None:
+            self.base.blit(self.sun_icon, self.sun_pos)
+        self.base.blit(self.drawing_layer, [0, 0])
+        self.base.blit(self.marker_layer, [0, 0])
+        self.base.set_clip(None)
+        return
+
+    def overlay(self, rect):
+        # Record an area drawn over the base, rubbed out at the next update
+        rect = rect.clip(self.rect)
+        if rect.width > 0 and rect.height > 0:
+            self.overlay_rects.append(rect)
         return
 
     def draw_tropics(self):
+        self.show_tropics = True    # Drawn again at other scales
         eq_color = (128, 128, 128)    # Equator
         t_color = (64, 64, 64)       # Tropics
         t_polar = (64, 64, 255)
@@ -279,42 +492,149 @@ class Map:
         x, y = self.latlong_to_xy(lat, long)
 
         # Draw circle, centred around icon
-        pygame.draw.circle(self.surface, icon_border_color, [x, y], int(icon_outer_size * self.screen_scale),
-                           int(icon_border_width * self.screen_scale))
+        self.overlay(pygame.draw.circle(self.surface, icon_border_color, [x, y],
+                                        int(icon_outer_size * self.screen_scale),
+                                        int(icon_border_width * self.screen_scale)))
 
         # Draw icon (uses top-left coordinates)
         offset = self.iss_icon.get_width() / 2
         x = int(x - offset)
         y = int(y - offset)
 
-        self.surface.blit(self.iss_icon, [x, y])
+        self.overlay(self.surface.blit(self.iss_icon, [x, y]))
 
         return
 
-    def draw_marker(self, id, name, lat, long):
-
-        # Plot a marker
-        radius = int(6 * self.screen_scale)  # Width of the X
-        line_width = int(2 * self.screen_scale)
+    def highlight_marker(self, lat, long):
+        # Ring around a place's marker, e.g. to show it can see the satellite
+        radius = int(10 * self.screen_scale)
+        line_width = max(1, int(2 * self.screen_scale))
         x, y = self.latlong_to_xy(lat, long)
+        self.overlay(pygame.draw.circle(self.surface, marker_highlight_color, [x, y], radius, line_width))
+        return
 
-        # Draw a circle
-        pygame.draw.circle(self.drawing_layer, marker_outline, [x, y], radius + line_width, line_width)
-        pygame.draw.circle(self.drawing_layer, marker_color, [x, y], radius, 0)
+    def stamp_markers(self, layer, xs, ys):
+        # Markers centred at each x, y
+        h = self.marker_half_size
+        layer.blits([(self.marker_image, (x - h, y - h)) for x, y in zip(xs.tolist(), ys.tolist())], doreturn=False)
+        return
 
-        # Create marker as a clickable sprite
-        mkr = Marker(id, name, x - radius - line_width, y - radius - line_width, 2 * (radius + line_width))
-        self.markers.add(mkr)
+    def plot_places(self, table, on_date):
+        # Marker layer and clickable markers for a place list
+        # Only plot places with GA date before on_date
+        layer = pygame.Surface([self.width, self.height], pygame.SRCALPHA, 32)
+        rows = table.valid_on(on_date)
+        xs, ys = self.latlongs_to_xy(table.lat[rows], table.lon[rows])
+        self.stamp_markers(layer, xs, ys)
+        return layer, MarkerGrid(table, rows, xs, ys, self.marker_half_size)
+
+    def clicked_marker(self, x, y):
+        # Show the id and name of the place clicked on, or clear them if there isn't one there
+        marker = self.markers.at(x, y)
+        if marker is None:
+            self.clicked_marker_field.write_text("")
+        else:
+            place = self.markers.place(marker)
+            self.clicked_marker_field.write_text(f"{place.id}, {place.name:120s}")
+        return
 
+    def load_places(self, name):
+        # Start loading a place list in the background: its table, search index, raster and marker layer
+        # Nothing happens if it's already loaded or loading. show_places() switches to it once it's ready
+        if name in self.place_layers or name in self.place_loading:
+            return
+        self.place_loading.add(name)
+        threading.Thread(target=self._load_places, args=(name,), name=f"load_places({name})", daemon=True).start()
         return
 
-    def plot_all_places(self, on_date=""):
-        # Only plot places with GA date before on_date
-        for region in places:
-            if region.valid_from < on_date:
-                self.draw_marker(region.id, region.name, region.latlong.lat, region.latlong.lon)
+    def _load_places(self, name):
+        try:
+            table = get_place_list(name)
+            table.tracker       # Builds the index
+            if self.raster_res:
+                use_raster(self.raster_res, self.raster_date, name)
+            while True:
+                # Stored, then plotted again for the new size if the window was resized meanwhile
+                place_layers = self.place_layers
+                place_layers[name] = self.plot_places(table, self.places_date)
+                if place_layers is self.place_layers:
+                    break
+        except Exception as e:     # Shown as a warning by show_places(), rather than the list loading forever
+            self.place_layers[name] = e
+        finally:
+            self.place_loading.discard(name)
         return
 
+    def watch_places(self, name):
+        # Reload the list when its file is edited (does nothing for lists that aren't read from a file)
+        if name not in self.place_watchers:
+            def listener(old, new, diff):
+                self.update_places(name, old, new, diff)
+            self.place_watchers[name] = watch_place_list(name, [listener])
+        return
+
+    def update_places(self, name, old, new, diff):
+        # Called by the place file watcher thread when a list has been edited. The differences are applied to a
+        # copy of the list's marker layer and markers, picked up by refresh_places() at the start of a frame
+        loaded = self.place_layers.get(name)
+        if not isinstance(loaded, tuple):
+            return
+        layer, markers = loaded[0].copy(), loaded[1]
+        on_date = date_ordinal(self.places_date)
+
+        # Rub out the removed markers, then redraw any others they overlapped
+        new_rows = diff.old_to_new[markers.rows]
+        kept = new_rows >= 0
+        h = self.marker_half_size
+        for x, y in zip(markers.x[~kept].tolist(), markers.y[~kept].tolist()):
+            layer.fill((0, 0, 0, 0), [x - h, y - h, 2 * h + 1, 2 * h + 1])
+        if not kept.all():
+            overlapped = [markers.in_rect(x - 2 * h, y - 2 * h, x + 2 * h + 1, y + 2 * h + 1)
+                          for x, y in zip(markers.x[~kept].tolist(), markers.y[~kept].tolist())]
+            overlapped = np.unique(np.concatenate(overlapped))
+            overlapped = overlapped[kept[overlapped]]
+            self.stamp_markers(layer, markers.x[overlapped], markers.y[overlapped])
+
+        added = diff.added[new.valid_from[diff.added] < on_date]
+        xs, ys = self.latlongs_to_xy(new.lat[added], new.lon[added])
+        self.stamp_markers(layer, xs, ys)
+
+        markers = MarkerGrid(new, np.concatenate((new_rows[kept], added)), np.concatenate((markers.x[kept], xs)),
+                             np.concatenate((markers.y[kept], ys)), h)
+        self.place_layers[name] = (layer, markers)
+
+        # Plotted again from the new list if the window goes back to another size
+        for scaled in list(self.scaled.values()):
+            if scaled['place_layers'] is not self.place_layers:
+                scaled['place_layers'].pop(name, None)
+        return
+
+    def refresh_places(self):
+        # Pick up the current list's marker layer if it has been updated since the last frame
+        loaded = self.place_layers.get(self.place_list_name)
+        if isinstance(loaded, tuple) and loaded[0] is not self.marker_layer:
+            self.marker_layer, self.markers = loaded
+        return
+
+    def show_places(self, name):
+        # Switch to a loaded place list, returns False if it's still loading (or failed)
+        # A list loaded at another window size (resized as it finished) is plotted again for this one
+        loaded = self.place_layers.get(name)
+        if loaded is None:
+            self.load_places(name)
+            return False
+        if isinstance(loaded, Exception):
+            print(f"Warning: place list {name} not loaded: {loaded}")
+            del self.place_layers[name]
+            return False
+
+        select_place_list(name)
+        self.place_list_name = name
+        self.marker_layer, self.markers = loaded
+        self.clicked_marker_field.write_text("")
+        self.watch_places(name)
+        return True
+
     def draw_line(self, from_lat, from_long, to_lat, to_long, color, lwidth):
 
         from_x, from_y = self.latlong_to_xy(from_lat, from_long)
@@ -332,189 +652,207 @@ class Map:
                 x1 = to_x + self.width
                 x2 = from_x - self.width
 
-            pygame.draw.line(self.surface, color, [from_x, from_y], [x1, to_y], lwidth)
-            pygame.draw.line(self.surface, color, [x2, from_y], [to_x, to_y], lwidth)
+            self.overlay(pygame.draw.line(self.surface, color, [from_x, from_y], [x1, to_y], lwidth))
+            self.overlay(pygame.draw.line(self.surface, color, [x2, from_y], [to_x, to_y], lwidth))
         else:
-            pygame.draw.line(self.surface, color, [from_x, from_y], [to_x, to_y], lwidth)
+            self.overlay(pygame.draw.line(self.surface, color, [from_x, from_y], [to_x, to_y], lwidth))
 
     def latlong_to_xy(self, lat, long):
         y = -int(((lat / 180.0) * self.height) - self.height / 2)
         x = int(((long / 360.0) * self.width) + self.width / 2)
         return x, y
 
+    def latlongs_to_xy(self, lats, longs):
+        # latlong_to_xy for arrays
+        y = -np.trunc(((np.asarray(lats) / 180.0) * self.height) - self.height / 2).astype(np.int64)
+        x = np.trunc(((np.asarray(longs) / 360.0) * self.width) + self.width / 2).astype(np.int64)
+        return x, y
+
     def xy_to_latlong(self, x, y):
         lat = (360.0 * x / self.width) - 180.0
         long = 90 - (180.0 * y / self.height)
         return lat, long
 
-    # Get Vernal and Autumnal Equinoxes to determine how to draw day/night
-    def get_equinoxes(self, year):
-        # Get seasons for current year
-        t0 = self.ts.utc(year, 1, 1)
-        t1 = self.ts.utc(year, 12, 31)
-        t, y = almanac.find_discrete(t0, t1, almanac.seasons(self.ephemeris))
-
-        for yi, ti in zip(y, t):
-            print(yi, almanac.SEASON_EVENTS[yi], ti.utc_iso(' '))
-
-        return t[0], t[2]
-
     def draw_night(self, time_factor):
 
         t_current = obs_time(self.ts, time_factor)  # Get current time
+        if self.sun_table is None:
+            self.load_sun(t_current)
+            self.hide_night()
+            return None
 
-        # Make a semi transparent surface
-        mask = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        mask_color = (0, 0, 0, 100)
-
-        # Loading the position of the Sun
-        sun_from_earth = self.ephemeris['earth'].at(t_current).observe(self.ephemeris['sun'])
-        ra, dec, distance = sun_from_earth.radec()
-
-        earth = 399
-        sun = skyfield.positionlib.position_of_radec(ra.hours, dec.degrees, t=t_current, center=earth)
-        sun_subpoint = wgs84.subpoint(sun)
-
-        sun_long_deg = sun_subpoint.longitude.degrees
-        sun_lat_deg = sun_subpoint.latitude.degrees
+        # Position of the Sun, interpolated from the table
+        sun_lat_deg, sun_long_deg = self.sun_table.subpoint(t_current)
 
         sun_x, sun_y = self.latlong_to_xy(sun_lat_deg, sun_long_deg)
 
         # Draw icon (uses top-left coordinates)
         offset = self.sun_icon.get_width() / 2
-        sun_x = int(sun_x - offset)
-        sun_y = int(sun_y - offset)
-
-        # TODO: Optimise by only drawing a new map if day changes, otherwise just shift mask left
-        # TODO: Allow for a mask which reveals underlying night image
-        # if DISPLAY_NIGHT:
-        #     day2 = self.map.day_image.copy()
-        #     black = (0, 0, 0)
-        #     day2.set_colorkey(black)
-        #     self.mask = self.map.draw_day_night(self.time_factor)
-        #     day2.blit(self.mask, (0, 0))
-
-        old_x, old_y = -1, -1  # dummy start
-        # old_y2 = -1
-        x, y = 0, 0
-        # y2 = 0
-
-        nsteps = 120
-        step = int(self.width / nsteps)
-
-        for x in range(0, self.width + step, step):
-            long_degrees = ((360.0 * x / self.width) - 180.0)
-            lat_degrees, declination = self.terminator(long_degrees, t_current)
-
-            # Shading of terminator line goes down when declination is > 0, otherwise up
-            end_y = self.height if declination > 0 else 0
-            y = -int(((lat_degrees / 180.0) * self.height) - self.height / 2)
-
-            ##
-            # lat_degrees_2, test_dec_2 = self.terminator2(long_degrees, t_current)
-            # end_y2 = self.height if test_dec_2 > 0 else 0
-            # y2 = -int(((lat_degrees_2 / 180.0) * self.height) - self.height / 2)
-
-            if old_x == -1:  # First time in loop
-                old_x = x
-                old_y = y
-                # old_y2 = y2
+        self.sun_pos = [int(sun_x - offset), int(sun_y - offset)]
+
+        if self.night_image is not None:
+            self.draw_blend(sun_lat_deg, sun_long_deg)
+            return None
+
+        # The terminator's shape only depends on the declination, the time of day just moves it across the map.
+        # The shading is drawn for midnight at longitude 0 and redrawn only when the declination has moved the
+        # terminator, otherwise the mask is a window onto it shifted by the time of day
+        declination, time_offset = math.radians(sun_lat_deg), -math.radians(sun_long_deg)
+        rows = self.terminator_rows(np.arange(self.width), declination)
+        if self.night_shade_rows is None or np.abs(rows - self.night_shade_rows).max() >= night_redraw_px or \
+                np.sign(declination) != self.night_shade_sign:
+            self.draw_night_shade(rows, declination)
+            self.night_shift = None
+
+        # As the window moves, only the terminator band changes
+        shift = int(round(time_offset / two_pi * self.width)) % self.width
+        if shift != self.night_shift:
+            if self.night_shift is None:
+                self.base_changes.append(self.rect)
             else:
-                # Draw the terminator (the day/night line, useful when testing)
-
-                # Uncomment to show hard line aas well as shading
-                # pygame.draw.line(mask, (0, 255, 0), (old_x, old_y), (x, y), width=5)
-                pygame.draw.polygon(mask, mask_color, ((old_x, old_y), (x, y), (x, end_y), (old_x, end_y)), 0)
-
-                # pygame.draw.line(mask, (255, 255, 0), (old_x, old_y2), (x, y2), width=5)
-                # pygame.draw.polygon(mask, mask_color, ((old_x, old_y2), (x, y2), (x, end_y2), (old_x, end_y2)), 0)
-
-                old_x = x
-                old_y = y
-                # old_y2 = y2
-
-        mask.blit(self.sun_icon, [sun_x, sun_y])
-
-        return mask
-
-    # Calculate latitude of the day/night terminator line for given longiture & time of day
-    def terminator(self, long_degrees, t_current):
-        # Calculations from https://github.com/marmat/google-maps-api-addons
-
-        max_declination = 23.44 * pi_over_180
-        tm = t_current.utc_datetime().timetuple()
-
-        day_secs = tm.tm_hour * 3600 + tm.tm_min * 60 + tm.tm_sec
-        fraction_of_day = day_secs / 86400
-        time_offset = two_pi * (0.5 + fraction_of_day)
+                self.base_changes += changed_rects(self.night_shade_alpha[self.night_shift:self.night_shift + self.width],
+                                                   self.night_shade_alpha[shift:shift + self.width])
+            self.night_shift = shift
+            self.night_window = self.night_shade.subsurface([shift, 0, self.width, self.height])
+        return self.night_window
+
+    def hide_night(self):
+        self.mask = None
+        self.sun_pos = None
+        self.background = self.day_image
+        return
 
-        declination = math.sin(two_pi * (t_current.ut1 - self.vernal.ut1) / 365) * max_declination
-        long = long_degrees * pi_over_180
+    def draw_blend(self, sun_lat_deg, sun_long_deg):
+        # Day image over the night image, weighted per pixel by the sun's elevation:
+        #   sin(elevation) = sin(lat) sin(sun lat) + cos(lat) cos(sun lat) cos(long - sun long)
+        # The weights are calculated for the sun at longitude 0 (again only once the sun's latitude has moved
+        # a pixel) over two map widths, so the sun's longitude just picks which columns are used. The images are
+        # blended again (by pygame) only when that has moved a pixel, and then only where the weights change
+        if self.day_weights is None or abs(sun_lat_deg - self.day_weights_lat) * self.height / 180 > 1:
+            self.day_weights = self.day_weight_table(math.radians(sun_lat_deg))
+            self.day_weights_lat = sun_lat_deg
+            self.blend_shift = None
+
+        shift = int(round(-sun_long_deg / 360 * self.width)) % self.width
+        if shift != self.blend_shift:
+            if self.blend_shift is None:
+                changed = [self.rect]
+            else:
+                changed = changed_rects(self.day_weights[self.blend_shift:self.blend_shift + self.width],
+                                        self.day_weights[shift:shift + self.width])
+            alpha = pygame.surfarray.pixels_alpha(self.day_blend)
+            alpha[:] = self.day_weights[shift:shift + self.width]
+            del alpha       # Unlocks the surface
+            for rect in changed:
+                self.blended.set_clip(rect)
+                self.blended.blit(self.night_image, [0, 0])
+                self.blended.blit(self.day_blend, [0, 0])
+            self.blended.set_clip(None)
+            self.base_changes += changed
+            self.blend_shift = shift
+
+        self.background = self.blended
+        return
 
-        # Avoid divide by zero when declination is zero
-        if abs(t_current.ut1 - self.vernal.ut1) < 1 / 86400000:  # or declination2 == 0:
-            lat_degrees = 0
+    def day_weight_table(self, sun_lat):
+        # Day weight (0 night to 255 day) per pixel, smoothed across the twilight band, for the sun at longitude 0
+        low, high = (math.sin(math.radians(e)) for e in twilight_deg)
+        a = self.row_sin_lat * math.sin(sun_lat)
+        b = self.row_cos_lat * math.cos(sun_lat)
+        sin_elevation = a[None, :] + self.col_cos_long[:, None] * b[None, :]
+        w = np.clip((sin_elevation - low) / (high - low), 0.0, 1.0)
+        w = w * w * (3 - 2 * w)     # Smoothstep
+        w = (w * 255 + 0.5).astype(np.uint8)
+        return np.concatenate((w, w))
+
+    def terminator_rows(self, columns, declination):
+        # Screen row of the terminator for each column at time_offset 0: cos(long + time_offset) = -tan(lat) tan(dec)
+        long = columns * (two_pi / self.width) - math.pi
+        if abs(declination) < 1e-12:
+            lat = np.zeros(len(columns))
         else:
-            lat_degrees = math.atan(-math.cos(long + time_offset) / math.tan(declination)) * one_eighty_over_pi
-
-        # if long_degrees == 0:
-        #     print(f"T1:  {t_current} :  long: {long:10.6f}  frac: {fraction_of_day:11.3f}  "
-        #           f"time_offset: {time_offset:10.8f}  dec: {declination:10.6f}  "
-        #           f"dec.degrees: {declination*one_eighty_over_pii}  lat:{lat_degrees:6.4f} "
-        #           f"dec3: {declination:18.16f}")
-
-        return lat_degrees, declination
-
-    # Alternative calculation of terminator using skyfield
-    def terminator2(self, long_degrees, t_current):
-        sun_from_earth = self.ephemeris['earth'].at(t_current).observe(self.ephemeris['sun'])
-
-        ra, dec, distance = sun_from_earth.radec()
-        declination = dec.degrees * pi_over_180
-        long = long_degrees * pi_over_180
-        day_secs = t_current.utc.hour * 3600 + t_current.utc.minute * 60 + t_current.utc.second
-        fraction_of_day = day_secs / 86400
-        time_offset = two_pi * (0.5 + fraction_of_day)
-
-        lat_degrees = math.atan(-math.cos(long + time_offset) / math.tan(declination)) * one_eighty_over_pi
+            lat = np.arctan(-np.cos(long) / math.tan(declination))
+        return self.height / 2 - lat / math.pi * self.height
+
+    def draw_night_shade(self, rows, declination):
+        # Alpha of every pixel of night_shade: night below the terminator when the declination is > 0,
+        # otherwise above it. Written straight into the surface's pixels with surfarray
+        self.night_shade_rows, self.night_shade_sign = rows, np.sign(declination)
+        y = np.arange(self.height)
+        term = rows.astype(int)[:, None]
+        night = y >= term if declination > 0 else y <= term
+        self.night_shade.fill((0, 0, 0, 0))
+        alpha = pygame.surfarray.pixels_alpha(self.night_shade)
+        alpha[:self.width] = night * night_alpha
+        alpha[self.width:] = alpha[:self.width]
+        self.night_shade_alpha = alpha.copy()
+        del alpha       # Unlocks the surface
+        return
 
-        # if long_degrees == 0:
-        #     print(f"T2:  {t_current} :  long: {long:10.6f}  frac: {fraction_of_day:11.3f}  "
-        #           f"time_offset: {time_offset:10.8f}  dec: {declination:10.6f}  "
-        #           f"dec.degrees: {dec.degrees}  lat:{lat_degrees:6.4f}")
+    def load_sun(self, t_current):
+        # Start loading the ephemeris and building the sun table around t_current in the background (the
+        # build observes the sun a few hundred times, tens of ms), once. draw_night() uses it once it's ready
+        if not self.sun_loading:
+            self.sun_loading = True
+            threading.Thread(target=self._load_sun, args=(t_current.tt,), name="load_sun", daemon=True).start()
+        return
 
-        return lat_degrees, declination
+    def _load_sun(self, tt):
+        try:
+            self.ephemeris = load(EPHEMERIS)
+            sun_table = SunTable(self.ephemeris, self.ts)
+            sun_table.build(tt)
+            self.sun_table = sun_table
+        except Exception as e:     # The map carries on without night
+            print(f"Warning: ephemeris {EPHEMERIS} not loaded, night not shown: {e}")
+        return
 
     def draw_orbits(self, time_factor):
 
         # Plot orbit track +/- 90 mins, increments of 2 min
-        increment_mins = 2
-        orbit_duration_mins = 90
-        orbit_time_mins = -orbit_duration_mins  # Start loop at preceding X minutes of orbit
-
-        # Start plot 90 minutes in the past
         t_current = obs_time(self.ts, time_factor)  # Get current time
-        # TODO change to UT1
-        orbit_time = self.ts.utc(t_current.utc_datetime() + datetime.timedelta(minutes=orbit_time_mins))
-        old_lat, old_long, alt, speed = get_sat_pos(self.sat, orbit_time)
+        samples_per_day = 1440 / orbit_increment_mins
+        first = math.floor((t_current.tt - orbit_duration_mins / 1440) * samples_per_day)
+        last = math.ceil((t_current.tt + orbit_duration_mins / 1440) * samples_per_day)
 
-        for orbit_time_mins in range(-orbit_duration_mins, orbit_duration_mins + increment_mins, increment_mins):
+        lats, longs = self.orbit_track_points(first, last, samples_per_day)
 
-            orbit_time = self.ts.utc(t_current.utc_datetime() + datetime.timedelta(minutes=orbit_time_mins))
-
-            orbit_lat, orbit_long, alt, speed = get_sat_pos(self.sat, orbit_time)
-
-            if orbit_time_mins > 0:
+        for i in range(1, len(lats)):
+            if (first + i) / samples_per_day > t_current.tt:
                 orbit_color = orbit_color_fwd
             else:
                 orbit_color = orbit_color_back
 
-            self.draw_line(orbit_lat, orbit_long, old_lat, old_long, orbit_color, 4)
-
-            old_lat, old_long = orbit_lat, orbit_long
+            self.draw_line(lats[i], longs[i], lats[i - 1], longs[i - 1], orbit_color, 4)
 
         return
 
+    def orbit_track_points(self, first, last, samples_per_day):
+        # Lat/longs of track samples first to last, only propagating those not already in self.orbit_track
+        sat, cached_first, lats, longs = self.orbit_track or (None, first, np.zeros(0), np.zeros(0))
+        cached_last = cached_first + len(lats) - 1
+        if sat is not self.sat or last < cached_first or first > cached_last:
+            # New satellite (TLE refreshed, or from the history) or a jump in time: start again
+            cached_first, cached_last = first, first - 1
+            lats, longs = np.zeros(0), np.zeros(0)
+
+        before = np.arange(first, min(cached_first, last + 1))
+        after = np.arange(max(cached_last + 1, first), last + 1)
+        if len(before) + len(after) > 0:
+            # One array valued Time and one propagation for all the new samples
+            t = self.ts.tt_jd(np.concatenate((before, after)) / samples_per_day)
+            new_lats, new_longs = wgs84.latlon_of(self.sat.at(t))
+            new_lats, new_longs = new_lats.degrees, new_longs.degrees
+            lats = np.concatenate((new_lats[:len(before)], lats, new_lats[len(before):]))
+            longs = np.concatenate((new_longs[:len(before)], longs, new_longs[len(before):]))
+            cached_first = min(first, cached_first)
+
+        # Drop samples that have gone out of range
+        lats = lats[first - cached_first:last - cached_first + 1]
+        longs = longs[first - cached_first:last - cached_first + 1]
+        self.orbit_track = (self.sat, first, lats, longs)
+        return lats.tolist(), longs.tolist()
+
 
 class App:
 
@@ -526,6 +864,12 @@ class App:
         self.sat = EarthSatellite(tle.line1, tle.line2, sat_name, self.ts)
         self.start_at = start_at
 
+        # Re-checks the TLE in the background, the new satellite is picked up at the start of a frame
+        self.refresher = SatelliteRefresher(tle, self.ts, self.sat)
+        self.refresher.start()
+        self.refresh_error = None   # Refresh failure last reported (the refresher doesn't print from its thread)
+        self.places_messages = {}   # Place list name -> reload message last reported (nor does the file watcher)
+
         self.screen_w, self.screen_h = screen_w, screen_h
         self.screen_scale = float(screen_w / base_w)
         print(f"Scale: {self.screen_scale}")
@@ -538,16 +882,24 @@ class App:
         self.map_y = int(header_h * self.screen_scale)
         # self.map_y = int((base_h - base_map_h)/2)
 
+        # The layout is drawn at the window's size (not stretched), again once the window stops being resized
+        self.screen_offset = (0, 0)     # Top left of the layout in the window (centred if the shape differs)
+        self.resize_to = None           # New window size, waiting for the resizing to stop
+        self.resize_due = 0
+        self.panels = OrderedDict()     # Header and data surfaces for the last few window sizes
+
         self.max_frame_rate = 1
         self.time_factor = 1.0
+        self.pending_places = None  # Place list switched to once loaded
         self.saved_time_factor = 1.0
         self.paused = False
 
         pygame.init()
         self.clock = pygame.time.Clock()
         self.main_surface = pygame.Surface([self.screen_w, self.screen_h])
+        self.full_redraw = True     # Present the whole screen at the next update, otherwise only what changed
 
-        options = pygame.FULLSCREEN + pygame.SCALED if fullscreen else 0
+        options = pygame.FULLSCREEN + pygame.SCALED if fullscreen else pygame.RESIZABLE
         # options = options + pygame.SCALED
         self.main_screen = pygame.display.set_mode([self.screen_w, self.screen_h], options)
         pygame.display.set_caption("Satellite Tracker")
@@ -557,32 +909,81 @@ class App:
         # Heading field centered
         self.header_surface = HeaderSurface(header_w, header_h, self.screen_scale, header_color)
         self.data_surface = DataSurface(data_surface_w, data_surface_h, self.screen_scale, data_surface_color)
+        self.panels[self.screen_scale] = (self.header_surface, self.data_surface)
 
-        pygame.event.set_allowed([QUIT, KEYDOWN])
+        pygame.event.set_allowed([QUIT, KEYDOWN, MOUSEBUTTONDOWN, VIDEORESIZE])
 
         return
 
-    def resize_screen(self, new_width, new_height):
-        pygame.display.set_mode([new_width, new_height])
-        new_surface = pygame.Surface([new_width, new_height])
-        pygame.transform.scale(self.main_surface, [new_width, new_height], new_surface)
+    def window_resized(self, new_width, new_height):
+        # While the window is being resized the last frame is stretched to fit, once per resize event.
+        # The layout is redrawn for the final size once there have been no resize events for resize_delay
+        self.main_screen = pygame.display.get_surface()
+        scale = min(new_width / base_w, new_height / base_h)
+        preview = pygame.transform.scale(self.main_surface, [int(base_w * scale), int(base_h * scale)])
+        self.main_screen.fill((0, 0, 0))
+        self.main_screen.blit(preview, preview.get_rect(center=(new_width // 2, new_height // 2)))
+        pygame.display.flip()
+
+        self.resize_to = (new_width, new_height)
+        self.resize_due = time.time() + resize_delay
+        return
 
-        self.main_surface = new_surface
-        pass
+    def resize_screen(self, new_width, new_height):
+        # Layout for a new window size: the map, markers and text fields drawn at the scale that fits the window,
+        # reused if the window has been that size recently
+        self.main_screen = pygame.display.get_surface()
+        self.screen_w, self.screen_h = new_width, new_height
+        self.screen_scale = min(new_width / base_w, new_height / base_h)
+        layout_w, layout_h = int(base_w * self.screen_scale), int(base_h * self.screen_scale)
+        self.screen_offset = ((new_width - layout_w) // 2, (new_height - layout_h) // 2)
+        self.map_y = int(header_h * self.screen_scale)
+        self.main_surface = pygame.Surface([layout_w, layout_h])
+
+        self.map.set_scale(self.screen_scale)
+        panels = self.panels.get(self.screen_scale)
+        if panels is None:
+            panels = (HeaderSurface(header_w, header_h, self.screen_scale, header_color),
+                      DataSurface(data_surface_w, data_surface_h, self.screen_scale, data_surface_color))
+            if len(self.panels) >= scaled_cache_size:
+                self.panels.popitem(last=False)
+        self.panels[self.screen_scale] = panels
+        self.panels.move_to_end(self.screen_scale)
+        self.header_surface, self.data_surface = panels
+
+        self.full_redraw = True
+        print(f"Scale: {self.screen_scale}")
+        return
 
     def update(self):
         # Background (map, whole screen) & data field surface (bottom of main screen)
-        self.main_surface.blit(self.map.surface, [self.map_x, self.map_y])
-        self.map.update()
-
-        # Header at top of main window
-        self.main_surface.blit(self.header_surface.surface, [0, 0])
-
-        # Data surface at bottom of main window
-        data_surface_y = self.main_screen.get_height() - self.data_surface.height
-        self.main_surface.blit(self.data_surface.surface, [0, data_surface_y])
-        self.main_screen.blit(self.main_surface, [0, 0])
-
+        # Only the areas changed this frame (map, text fields) are composed and presented
+        data_surface_y = self.main_surface.get_height() - self.data_surface.height
+        layers = [(self.map.surface, [self.map_x, self.map_y]),
+                  (self.header_surface.surface, [0, 0]),            # Header at top of main window
+                  (self.data_surface.surface, [0, data_surface_y])]  # Data surface at bottom of main window
+
+        rects = [rect.move(self.map_x, self.map_y) for rect in self.map.dirty_rects()]
+        rects += take_dirty_rects(self.header_surface.fields)
+        rects += [rect.move(0, data_surface_y) for rect in take_dirty_rects(self.data_surface.fields)]
+        if self.full_redraw:
+            rects = [self.main_surface.get_rect()]
+
+        if self.full_redraw:
+            self.main_screen.fill((0, 0, 0))
+        screen_rects = [rect.move(self.screen_offset) for rect in rects]
+        for rect, screen_rect in zip(rects, screen_rects):
+            self.main_surface.set_clip(rect)
+            for surface, pos in layers:
+                self.main_surface.blit(surface, pos)
+            self.main_screen.blit(self.main_surface, screen_rect, rect)
+        self.main_surface.set_clip(None)
+
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(screen_rects)
         return
 
     def run(self):
@@ -606,20 +1007,13 @@ class App:
                 if event.type == pygame.QUIT:
                     running = False
                 if event.type == pygame.VIDEORESIZE:
-                    # There's some code to add back window content here.
-                    # old_surface_saved = self.main_screen
-                    self.main_screen = pygame.display.set_mode((event.w, event.h))
+                    self.window_resized(event.w, event.h)
                 elif event.type == MOUSEBUTTONDOWN:
                     # Find which city was clicked on
                     x, y = event.pos
-                    y -= self.map_y  # Offset of map relative to app
-                    marker_found = False
-                    for m in self.map.markers:
-                        if m.rect.collidepoint(x, y):
-                            m.display_info(self.map.clicked_marker_field)
-                            marker_found = True
-                    if not marker_found:
-                        self.map.clicked_marker_field.write_text("")
+                    x -= self.screen_offset[0] + self.map_x
+                    y -= self.screen_offset[1] + self.map_y  # Offset of map relative to app
+                    self.map.clicked_marker(x, y)
                 elif event.type == KEYDOWN:
                     if event.key == K_ESCAPE or event.key == K_q:  # Q/Esc = Quit
                         running = False
@@ -653,6 +1047,10 @@ class App:
                         app_time_prev = actual_time_prev
                     elif event.key == K_n:  # Day Night Mask
                         DISPLAY_NIGHT = not DISPLAY_NIGHT
+                    elif event.key == K_l:  # L = Next place list (loaded in the background)
+                        self.pending_places = next_place_list_name(self.pending_places or self.map.place_list_name)
+                        print(f"Place list: {self.pending_places}")
+                        self.map.load_places(self.pending_places)
                     # Increase the max frame rate when the time factor speeds up (crude!)
                     if abs(self.time_factor) >= 8:
                         self.max_frame_rate = 40
@@ -660,8 +1058,34 @@ class App:
                         self.max_frame_rate = 1
 
 
+            # Redraw the layout for the new window size once it has stopped changing
+            if self.resize_to is not None:
+                if time.time() < self.resize_due:
+                    self.clock.tick(30)
+                    continue
+                self.resize_screen(*self.resize_to)
+                self.resize_to = None
+
+            # Switch place list once it has loaded, or pick up changes to the current list's file
+            if self.pending_places is not None and self.pending_places not in self.map.place_loading:
+                self.map.show_places(self.pending_places)
+                if self.pending_places not in self.map.place_loading:
+                    self.pending_places = None
+            self.map.refresh_places()
+
             # Get sat time & data
             sat_time = obs_time(self.ts, t_factor=self.time_factor)
+
+            # Propagate from the TLE closest in time (picks up refreshed TLEs and the history when time travelling)
+            self.sat = self.map.sat = self.refresher.sat_at(sat_time)
+            if self.refresher.last_error != self.refresh_error:
+                if self.refresher.last_error is not None:
+                    print(f"Warning: {self.refresher.last_error}")
+                self.refresh_error = self.refresher.last_error
+            for name, watcher in self.map.place_watchers.items():
+                if watcher is not None and watcher.last_message != self.places_messages.get(name):
+                    print(watcher.last_message)
+                    self.places_messages[name] = watcher.last_message
             sat_lat, sat_long, alt, speed = get_sat_pos(self.sat, sat_time)
 
             # Update data fields
@@ -670,7 +1094,7 @@ class App:
             long_dir = "E" if sat_long > 0 else "W"
 
             # Find the closest place
-            valid_when = sat_time.utc_strftime("%Y-%m-%d")
+            valid_when = jd_to_ordinal(sat_time.ut1)
             closest_place, dist = closest_place_to(latlong(sat_lat, sat_long), valid_when)
             place_id = closest_place.id
             place_name = closest_place.name
@@ -684,25 +1108,43 @@ class App:
             self.data_surface.timefactor_field.write_text(f"{self.time_factor:-.1f}")
             self.data_surface.place_field.write_text(f"{place_id} ({dist:.0f}km)")
 
-            # Display name of the closes place & draw line from sat to that location
+            # Display name of the closes place
             self.header_surface.heading_field.write_text(f" {place_id}, {place_name} ")
+
+            # Update background elements, then rub out last frame's satellite, track etc
+            if DISPLAY_NIGHT:
+                self.map.mask = self.map.draw_night(self.time_factor)
+            else:
+                self.map.hide_night()
+            self.map.update()
+
+            # Highlight every place that can see the satellite (within its footprint)
+            for visible_place, d in within_radius(latlong(sat_lat, sat_long), footprint_radius_km(alt), valid_when,
+                                                  limit=max_highlights):
+                self.map.highlight_marker(visible_place.latlong.lat, visible_place.latlong.lon)
+
+            # Draw line from sat to the closest place
             self.map.draw_line(sat_lat, sat_long, place_loc.lat, place_loc.lon, icon_border_color, 4)
 
             # Plot satellite position and orbit lines
             self.map.draw_orbits(self.time_factor)
             self.map.plot_sat(sat_lat, sat_long)
-            if DISPLAY_NIGHT:
-                self.map.mask = self.map.draw_night(self.time_factor)
-            else:
-                self.map.mask = pygame.Surface([1,1])
 
             self.clock.tick(self.max_frame_rate)
-            pygame.display.flip()
-            # Update background elements
             self.update()
 
+        self.refresher.stop()
         pygame.quit()
 
+        if DEBUG:
+            # Text render cache, for tuning text_cache_size
+            fields = {'heading': self.header_surface.heading_field, 'clicked': self.map.clicked_marker_field}
+            fields.update((name[:-len('_field')], field) for name, field in vars(self.data_surface).items()
+                          if name.endswith('_field'))
+            for name, field in fields.items():
+                print(f"Text cache {name:12s} hits: {field.cache_hits:7d}  misses: {field.cache_misses:7d}  "
+                      f"size: {len(field.cache)}/{field.cache_size}")
+
         return
 
 
@@ -755,6 +1197,17 @@ def get_screen_size():
     return w, h
 
 
+def changed_rects(before, after, strip=dirty_strip_px):
+    # Rects covering the pixels that differ between two (width, height) arrays, one per strip of columns
+    changed = before != after
+    rects = []
+    for x in range(0, len(changed), strip):
+        rows = np.flatnonzero(changed[x:x + strip].any(axis=0))
+        if len(rows) > 0:
+            rects.append(pygame.Rect(x, rows[0], min(strip, len(changed) - x), rows[-1] - rows[0] + 1))
+    return rects
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='ISS Tracker')
@@ -767,6 +1220,10 @@ if __name__ == "__main__":
                             required=False, default=False, action="store_true")
     size_group.add_argument('-w', '--window_width', help=f'Window Width [{base_w}]', type=int, default=base_w)
     parser.add_argument('-l', '--ll', help="Draw latitude lines: Equator, Tropics, polar circles", required=False, default=False, action="store_true")
+    parser.add_argument('-p', '--places', help=f"Place list [{DEFAULT_PLACE_LIST}]", choices=list(PLACE_LISTS),
+                        default=DEFAULT_PLACE_LIST)
+    parser.add_argument('-r', '--raster', help="Nearest place lookup raster, cell size in degrees (e.g. 0.5)", type=float, required=False)
+    parser.add_argument('--shade', help="Shade the night black instead of showing the night image", required=False, default=False, action="store_true")
 
     args = parser.parse_args()
     DEBUG = args.debug
@@ -774,6 +1231,7 @@ if __name__ == "__main__":
     start_at = args.start_at
     fullscreen = args.fullscreen
     draw_tropics = args.ll
+    NIGHT_BLEND = not args.shade
 
     # Default 1920 x 1080
     win_w, win_h = 1920, 1080
@@ -788,9 +1246,19 @@ if __name__ == "__main__":
 
     # found, tle_line1, tle_line2 = get_tle(sat_name)
     tle = TLE(sat_name)
+    if tle.fetch_error is not None:
+        print(f"Warning: {tle.fetch_error}")
 
     if tle.is_valid():
+        select_place_list(args.places)
+        if args.raster:
+            # Built for the places valid on the start date, other dates use the spatial index
+            raster_date = start_at[:10] if start_at else ''
+            raster = use_raster(args.raster, raster_date)
+            print(f"Place raster: {args.raster} degree cells, {raster.nbytes / 1e6:.1f} MB")
         app = App(sat_name, win_w, win_h, start_at, fullscreen=fullscreen)
+        if args.raster:
+            app.map.raster_res, app.map.raster_date = args.raster, raster_date
 
         if draw_tropics:
             app.map.draw_tropics()
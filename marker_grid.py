@@ -0,0 +1,90 @@
+# marker_grid.py
+# Clickable place markers on the map, kept as arrays of screen positions rather than a sprite per place
+# A uniform grid over the screen (a spatial hash) lists the markers whose squares overlap each cell, so a click
+# only tests the few markers in the cell under it. The markers are sorted by cell, with the start of each
+# cell's run in cell_start (like the cells of place_raster).
+#
+# 18-oct-2026   Created
+
+import numpy as np
+
+CELL_MARKERS = 2    # Cell size in marker widths
+
+
+class MarkerGrid:
+
+    def __init__(self, table, rows, x, y, half_size, cell_size=None):
+        # Markers for places rows of table, centred at screen positions x, y, each a square 2 * half_size across
+        # (the same area as a pygame Rect at x - half_size, y - half_size, i.e. x - half_size <= px < x + half_size)
+        self.table = table
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.x = np.asarray(x, dtype=np.int64)
+        self.y = np.asarray(y, dtype=np.int64)
+        self.half_size = int(half_size)
+        self.cell_size = int(cell_size or max(1, CELL_MARKERS * 2 * self.half_size))
+
+        # Grid covering every marker: cells from (x0, y0), cols across
+        if len(self.x) > 0:
+            self.x0 = int(self.x.min()) - self.half_size
+            self.y0 = int(self.y.min()) - self.half_size
+            self.cols = (int(self.x.max()) + self.half_size - self.x0) // self.cell_size + 1
+            self.grid_rows = (int(self.y.max()) + self.half_size - self.y0) // self.cell_size + 1
+        else:
+            self.x0 = self.y0 = 0
+            self.cols = self.grid_rows = 0
+        self.cell_start, self.cell_marker = self.build()
+        return
+
+    def __len__(self):
+        return len(self.rows)
+
+    def cell_range(self, low, high, origin):
+        # First and last cell along an axis overlapping low <= p < high
+        return (low - origin) // self.cell_size, (high - 1 - origin) // self.cell_size
+
+    def build(self):
+        # Each marker is listed in every cell its square overlaps (up to 4, as cells are bigger than markers)
+        h = self.half_size
+        col0, col1 = self.cell_range(self.x - h, self.x + h, self.x0)
+        row0, row1 = self.cell_range(self.y - h, self.y + h, self.y0)
+        cells, markers = [], []
+        for rows in (row0, row1):
+            for cols in (col0, col1):
+                cells.append(rows * self.cols + cols)
+                markers.append(np.arange(len(self.x)))
+        cells, markers = np.concatenate(cells), np.concatenate(markers)
+
+        # Markers spanning a single cell (or row, or column) were listed more than once
+        cells, first = np.unique(cells * len(self.x) + markers, return_index=True)
+        cells, markers = cells // max(len(self.x), 1), markers[first]
+        cell_start = np.zeros(self.cols * self.grid_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self.cols * self.grid_rows), out=cell_start[1:])
+        return cell_start, markers
+
+    def in_rect(self, left, top, right, bottom):
+        # Markers (numbers, not rows) whose squares overlap left <= px < right, top <= py < bottom
+        if len(self.x) == 0:
+            return np.zeros(0, dtype=np.int64)
+        col0, col1 = self.cell_range(left, right, self.x0)
+        row0, row1 = self.cell_range(top, bottom, self.y0)
+        col0, col1 = max(col0, 0), min(col1, self.cols - 1)
+        row0, row1 = max(row0, 0), min(row1, self.grid_rows - 1)
+        if col0 > col1 or row0 > row1:
+            return np.zeros(0, dtype=np.int64)     # Outside the grid, so no markers there
+        found = [self.cell_marker[self.cell_start[row * self.cols + col0]:self.cell_start[row * self.cols + col1 + 1]]
+                 for row in range(row0, row1 + 1)]
+        found = np.unique(np.concatenate(found))
+        h = self.half_size
+        x, y = self.x[found], self.y[found]
+        return found[(x - h < right) & (left < x + h) & (y - h < bottom) & (top < y + h)]
+
+    def at(self, px, py):
+        # Marker (number) under the point px, py, the one with the nearest centre if they overlap, else None
+        found = self.in_rect(px, py, px + 1, py + 1)
+        if len(found) == 0:
+            return None
+        d2 = (self.x[found] - px) ** 2 + (self.y[found] - py) ** 2
+        return int(found[np.argmin(d2)])
+
+    def place(self, marker):
+        return self.table[int(self.rows[marker])]
@@ -0,0 +1,513 @@
+# place_index.py
+# Spatial index for finding the nearest place to a lat/long
+# Places are converted to 3D unit vectors on the sphere and stored in a KD-tree. The straight line (chord)
+# distance between unit vectors increases with the great circle distance, so the nearest point in 3D is
+# exactly the nearest place on the Earth's surface, and a KD-tree gives that in O(log n) per query
+#
+# 18-oct-2026   Created
+# 18-oct-2026   Built from unit vectors (see PlaceTable.xyz) with valid_from as ordinal dates
+# 18-oct-2026   Date filter uses each place's position in activation order, the date cutoff is memoised
+# 18-oct-2026   nearest_many(): vectorised batch queries over whole arrays of positions
+# 18-oct-2026   k_nearest() and within_radius() queries
+# 18-oct-2026   NearestTracker: incremental nearest place for a slowly moving point (e.g. the sub-satellite point)
+# 18-oct-2026   radius_pairs_many(): vectorised radius queries, each with its own radius
+# 18-oct-2026   updated(): index for an edited place list, reusing the tree (places added since are in a short tail)
+# 18-oct-2026   within_radius() limit: only the nearest few are sorted and returned
+
+import copy
+import heapq
+import math
+from bisect import bisect_left
+
+import numpy as np
+
+R = 6378.1          # Radius of Earth (km), same as places.py
+LEAF_SIZE = 16      # Max places in a leaf node, these are checked with a single vectorised distance calculation
+MIN_MARGIN_KM = 50  # NearestTracker: smallest distance the point can move before its neighbourhood is searched again
+REUSE_STEPS = 8     # NearestTracker: aim to answer about this many steps (at the last step size) per search
+TAIL_MAX = 1024     # updated(): most places added to a tree before it is rebuilt
+TAIL_BLOCK = 256    # Tail places compared with a chunk of batch queries at a time
+
+
+def to_xyz(lats, lons):
+    # Lat/long (degrees) to unit vectors, shape (n, 3)
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def chord2_to_km(d2):
+    # Squared chord length between unit vectors to great circle distance (km)
+    return 2 * R * np.arcsin(np.minimum(1.0, np.sqrt(d2) / 2))
+
+
+def km_to_chord2(km):
+    # Great circle distance (km) to squared chord length between unit vectors
+    return (2 * math.sin(min(km / R, math.pi) / 2)) ** 2
+
+
+class PlaceIndex:
+    # KD-tree over the places' unit vectors. Built once per place list, then reused for every query
+    # Points are reordered so that each node covers a contiguous range [lo, hi) of the sorted arrays;
+    # `order` maps a sorted position back to the index in the original place list
+    # After updated(), positions from tree_size on are places added since the tree was built (the tail), and
+    # removed places stay in the tree with order -1 and a rank no date reaches
+
+    def __init__(self, xyz, valid_from=None):
+        xyz = np.asarray(xyz, dtype=np.float64)
+        n = len(xyz)
+
+        # Only places with valid_from < on_date are considered. Places are ranked by activation date, so those
+        # valid on a date are the ranks below a cutoff found by bisection, and each node records its lowest
+        # rank so subtrees with nothing active yet are skipped
+        if valid_from is None:
+            valid_from = np.zeros(n, dtype=np.int64)
+        by_date = np.argsort(valid_from, kind='stable')
+        self.date_array = np.asarray(valid_from, dtype=np.int64)[by_date]     # For the batch queries
+        self.dates = self.date_array.tolist()                                # For bisect, per query
+        rank = np.empty(n, dtype=np.int64)
+        rank[by_date] = np.arange(n)
+        self._cutoff = (None, n)
+
+        self.order = np.arange(n)
+        self.node_lo, self.node_hi = [], []
+        self.node_left, self.node_right = [], []
+        self.node_min, self.node_max = [], []
+        if n > 0:
+            self._build(xyz, 0, n)
+
+        self.xyz = xyz[self.order]
+        self.rank = rank[self.order]
+        self.tree_size = n
+        self.removed = 0
+        self.node_min_rank = self._min_ranks()
+        self._node_arrays = None
+        return
+
+    @classmethod
+    def from_latlong(cls, lats, lons, valid_from=None):
+        return cls(to_xyz(lats, lons), valid_from)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _build(self, xyz, lo, hi):
+        # Split on the widest dimension at the median, returns the node number
+        node = len(self.node_lo)
+        pts = xyz[self.order[lo:hi]]
+        box_min, box_max = pts.min(axis=0), pts.max(axis=0)
+        self.node_lo.append(lo)
+        self.node_hi.append(hi)
+        self.node_min.append(box_min.tolist())
+        self.node_max.append(box_max.tolist())
+        self.node_left.append(-1)
+        self.node_right.append(-1)
+
+        if hi - lo > LEAF_SIZE:
+            dim = int(np.argmax(box_max - box_min))
+            mid = (hi - lo) // 2
+            part = np.argpartition(pts[:, dim], mid)
+            self.order[lo:hi] = self.order[lo:hi][part]
+            self.node_left[node] = self._build(xyz, lo, lo + mid)
+            self.node_right[node] = self._build(xyz, lo + mid, hi)
+        return node
+
+    def _min_ranks(self):
+        # Lowest rank in each node. Children are numbered after their parent, so work back from the last node
+        min_rank = [0] * len(self.node_lo)
+        for node in range(len(self.node_lo) - 1, -1, -1):
+            left = self.node_left[node]
+            if left < 0:
+                min_rank[node] = int(self.rank[self.node_lo[node]:self.node_hi[node]].min())
+            else:
+                min_rank[node] = min(min_rank[left], min_rank[self.node_right[node]])
+        return min_rank
+
+    def updated(self, old_to_new, xyz, valid_from):
+        # Index for an edited version of the place list, without rebuilding the tree. old_to_new holds the new
+        # index of each place in the old list (-1 if removed), xyz and valid_from are the whole new list.
+        # Places still in the list keep their position in the tree, new places go in the tail (searched by brute
+        # force), and ranks are recalculated for the new dates. Rebuilt instead once the tail gets long or a
+        # quarter of the tree has been removed
+        old_to_new = np.asarray(old_to_new, dtype=np.int64)
+        xyz = np.asarray(xyz, dtype=np.float64)
+        n = len(xyz)
+
+        order = np.where(self.order >= 0, old_to_new[np.maximum(self.order, 0)], -1)
+        tail = order[self.tree_size:]
+        kept = np.zeros(n, dtype=bool)
+        kept[order[order >= 0]] = True
+        tail = np.concatenate((tail[tail >= 0], np.flatnonzero(~kept)))
+        removed = int((order[:self.tree_size] < 0).sum())
+        if len(tail) > min(TAIL_MAX, max(LEAF_SIZE, n // 8)) or removed > self.tree_size // 4:
+            return PlaceIndex(xyz, valid_from)
+
+        index = copy.copy(self)
+        index.order = np.concatenate((order[:self.tree_size], tail))
+        index.xyz = np.concatenate((self.xyz[:self.tree_size], xyz[tail]))
+        index.removed = removed
+
+        by_date = np.argsort(valid_from, kind='stable')
+        index.date_array = np.asarray(valid_from, dtype=np.int64)[by_date]
+        index.dates = index.date_array.tolist()
+        rank = np.empty(n + 1, dtype=np.int64)
+        rank[by_date] = np.arange(n)
+        rank[n] = n + 1         # Removed places, never below a cutoff
+        index.rank = rank[np.where(index.order >= 0, index.order, n)]
+        index._cutoff = (None, n)
+        index.node_min_rank = index._min_ranks()
+        index._node_arrays = None
+        return index
+
+    def _tail_points(self, q, cutoff):
+        # Sorted positions and squared distances of the valid places in the tail
+        lo = self.tree_size
+        d2 = ((self.xyz[lo:] - q) ** 2).sum(axis=1)
+        valid = self.rank[lo:] < cutoff
+        return np.arange(lo, len(self.xyz))[valid], d2[valid]
+
+    def date_cutoff(self, on_date):
+        # Places with rank below the cutoff are valid on on_date. Consecutive queries are usually for the same
+        # day, so the last answer is kept
+        if on_date is None:
+            return len(self.dates)
+        if self._cutoff[0] != on_date:
+            self._cutoff = (on_date, bisect_left(self.dates, on_date))
+        return self._cutoff[1]
+
+    def _box_dist2(self, node, x, y, z):
+        # Squared distance from a point to a node's bounding box (0 if inside)
+        d2 = 0.0
+        for q, lo, hi in zip((x, y, z), self.node_min[node], self.node_max[node]):
+            if q < lo:
+                d2 += (lo - q) ** 2
+            elif q > hi:
+                d2 += (q - hi) ** 2
+        return d2
+
+    def nearest(self, lat, lon, on_date=None):
+        # Index (into the original list) and distance (km) of the nearest place valid on on_date (an ordinal date)
+        # Returns None, None if there are no valid places
+        cutoff = self.date_cutoff(on_date)
+        x, y, z = to_xyz([lat], [lon])[0].tolist()
+        q = np.array((x, y, z))
+
+        best_d2, best = math.inf, -1
+        pos, d2 = self._tail_points(q, cutoff)
+        if len(pos) > 0:
+            i = int(np.argmin(d2))
+            best_d2, best = float(d2[i]), int(pos[i])
+
+        stack = [0] if self.tree_size > 0 else []
+        while stack:
+            node = stack.pop()
+            if self.node_min_rank[node] >= cutoff or self._box_dist2(node, x, y, z) >= best_d2:
+                continue
+
+            left, right = self.node_left[node], self.node_right[node]
+            if left < 0:
+                lo, hi = self.node_lo[node], self.node_hi[node]
+                d2 = ((self.xyz[lo:hi] - q) ** 2).sum(axis=1)
+                d2[self.rank[lo:hi] >= cutoff] = math.inf
+                i = int(np.argmin(d2))
+                if d2[i] < best_d2:
+                    best_d2, best = float(d2[i]), lo + i
+            else:
+                # Visit the nearer child first (pushed last) so the bound tightens quickly
+                if self._box_dist2(left, x, y, z) <= self._box_dist2(right, x, y, z):
+                    stack += [right, left]
+                else:
+                    stack += [left, right]
+
+        if best < 0:
+            return None, None
+        return int(self.order[best]), float(chord2_to_km(best_d2))
+
+    def _leaf_points(self, node, q, cutoff):
+        # Sorted positions and squared distances of the valid places in a leaf
+        lo, hi = self.node_lo[node], self.node_hi[node]
+        d2 = ((self.xyz[lo:hi] - q) ** 2).sum(axis=1)
+        valid = self.rank[lo:hi] < cutoff
+        return np.arange(lo, hi)[valid], d2[valid]
+
+    def k_nearest(self, lat, lon, k, on_date=None):
+        # Indices and distances (km) of the k nearest places valid on on_date, nearest first
+        cutoff = self.date_cutoff(on_date)
+        x, y, z = to_xyz([lat], [lon])[0].tolist()
+        q = np.array((x, y, z))
+
+        heap = []       # Max heap of the best k so far as (-d2, position)
+        bound = self._push_nearest(heap, k, *self._tail_points(q, cutoff))
+        stack = [0] if self.tree_size > 0 and k > 0 else []
+        while stack:
+            node = stack.pop()
+            if self.node_min_rank[node] >= cutoff or self._box_dist2(node, x, y, z) >= bound:
+                continue
+
+            left, right = self.node_left[node], self.node_right[node]
+            if left < 0:
+                bound = self._push_nearest(heap, k, *self._leaf_points(node, q, cutoff))
+            elif self._box_dist2(left, x, y, z) <= self._box_dist2(right, x, y, z):
+                stack += [right, left]
+            else:
+                stack += [left, right]
+
+        best = sorted((-d2, pos) for d2, pos in heap)
+        indices = np.array([self.order[pos] for _, pos in best], dtype=np.int64)
+        return indices, chord2_to_km(np.array([d2 for d2, _ in best]))
+
+    @staticmethod
+    def _push_nearest(heap, k, positions, d2s):
+        # Add points to the max heap of the k nearest so far, returns the distance to beat (inf until there are k)
+        for pos, d2 in zip(positions, d2s):
+            if len(heap) < k:
+                heapq.heappush(heap, (-d2, pos))
+            elif d2 < -heap[0][0]:
+                heapq.heapreplace(heap, (-d2, pos))
+        return -heap[0][0] if 0 < k == len(heap) else math.inf
+
+    def within_radius(self, lat, lon, km, on_date=None, limit=None):
+        # Indices and distances (km) of all places valid on on_date within km, nearest first, only the nearest
+        # limit of them if limit is given (partitioned out before sorting, so a wide radius is cheap)
+        pos, d2 = self.radius_positions(lat, lon, km, self.date_cutoff(on_date))
+        if limit is not None and limit < len(d2):
+            nearest = np.sort(np.argpartition(d2, limit - 1)[:limit]) if limit > 0 else np.zeros(0, dtype=np.int64)
+            pos, d2 = pos[nearest], d2[nearest]
+        nearest_first = np.argsort(d2, kind='stable')
+        return self.order[pos[nearest_first]], chord2_to_km(d2[nearest_first])
+
+    def radius_positions(self, lat, lon, km, cutoff):
+        # Sorted positions and squared chord distances of the valid places within km, in no particular order
+        x, y, z = to_xyz([lat], [lon])[0].tolist()
+        q = np.array((x, y, z))
+        bound = km_to_chord2(km)
+
+        pos, d2 = self._tail_points(q, cutoff)
+        inside = d2 <= bound
+        found_pos, found_d2 = [pos[inside]], [d2[inside]]
+        stack = [0] if self.tree_size > 0 else []
+        while stack:
+            node = stack.pop()
+            if self.node_min_rank[node] >= cutoff or self._box_dist2(node, x, y, z) > bound:
+                continue
+            if self.node_left[node] < 0:
+                pos, d2 = self._leaf_points(node, q, cutoff)
+                inside = d2 <= bound
+                found_pos.append(pos[inside])
+                found_d2.append(d2[inside])
+            else:
+                stack += [self.node_left[node], self.node_right[node]]
+
+        return np.concatenate(found_pos), np.concatenate(found_d2)
+
+    def node_arrays(self):
+        # The tree as NumPy arrays for the batch queries, built on first use
+        if self._node_arrays is None:
+            self._node_arrays = (np.array(self.node_lo), np.array(self.node_hi),
+                                 np.array(self.node_left), np.array(self.node_right),
+                                 np.array(self.node_min).reshape(-1, 3), np.array(self.node_max).reshape(-1, 3),
+                                 np.array(self.node_min_rank))
+        return self._node_arrays
+
+    def date_cutoffs(self, on_dates, count):
+        # Cutoff (see date_cutoff) for each query, on_dates is None, one ordinal, or an array of ordinals
+        if on_dates is None:
+            return np.full(count, len(self.dates), dtype=np.int64)
+        return np.broadcast_to(np.searchsorted(self.date_array, on_dates, side='left'), (count,))
+
+    def nearest_many(self, lats, lons, on_dates=None, chunk_size=4096):
+        # Nearest place for every lat/long in the arrays, optionally each on its own date (ordinals)
+        # Returns arrays of indices into the original list (-1 if none valid) and distances (km, inf if none)
+        q_all = to_xyz(np.ravel(lats), np.ravel(lons))
+        cutoff_all = self.date_cutoffs(on_dates, len(q_all))
+
+        indices = np.full(len(q_all), -1, dtype=np.int64)
+        d2_all = np.full(len(q_all), np.inf)
+        if len(self) == 0:
+            return indices, d2_all
+
+        for start in range(0, len(q_all), chunk_size):
+            end = start + chunk_size
+            best, d2 = self._nearest_chunk(q_all[start:end], cutoff_all[start:end])
+            found = best >= 0
+            indices[start:end][found] = self.order[best[found]]
+            d2_all[start:end] = d2
+
+        return indices, chord2_to_km(d2_all)
+
+    def _box_dist2_many(self, q, nodes):
+        # Squared distance from each query point to the bounding box of the paired node
+        _, _, _, _, box_min, box_max, _ = self.node_arrays()
+        d = np.maximum(box_min[nodes] - q, 0) + np.maximum(q - box_max[nodes], 0)
+        return (d * d).sum(axis=1)
+
+    def _leaf_distances(self, q, query, nodes, cutoff):
+        # Squared distances from each (query, leaf) pair's query to the leaf's points, shape (pairs, LEAF_SIZE),
+        # inf for padding and places not valid yet. Also returns the matching sorted positions
+        node_lo, node_hi = self.node_arrays()[:2]
+        lo, hi = node_lo[nodes], node_hi[nodes]
+        pos = lo[:, None] + np.arange(LEAF_SIZE)
+        pos_ok = pos < hi[:, None]
+        pos = np.where(pos_ok, pos, lo[:, None])
+        diff = self.xyz[pos] - q[query][:, None, :]
+        d2 = (diff * diff).sum(axis=2)
+        d2[~pos_ok | (self.rank[pos] >= cutoff[query][:, None])] = np.inf
+        return d2, pos
+
+    def _leaf_candidates(self, q, query, nodes, cutoff):
+        # Nearest valid point in each (query, leaf) pair: returns squared distances and sorted positions
+        d2, pos = self._leaf_distances(q, query, nodes, cutoff)
+        j = np.argmin(d2, axis=1)
+        rows = np.arange(len(nodes))
+        return d2[rows, j], pos[rows, j]
+
+    def _update_best(self, best, best_d2, query, d2, pos):
+        # Keep the smallest distance per query (ties to the lowest position, as in nearest())
+        order = np.lexsort((pos, d2, query))
+        query, d2, pos = query[order], d2[order], pos[order]
+        first = np.ones(len(query), dtype=bool)
+        first[1:] = query[1:] != query[:-1]
+        query, d2, pos = query[first], d2[first], pos[first]
+        better = d2 < best_d2[query]
+        best_d2[query[better]] = d2[better]
+        best[query[better]] = pos[better]
+
+    def radius_pairs_many(self, q, bound2, cutoff):
+        # All (query, sorted position) pairs with the place valid and within sqrt(bound2[query]) of unit vector
+        # q[query] (chord length). Breadth first over (query, node) pairs like _nearest_chunk, with fixed bounds
+        node_left, node_right, node_min_rank = self.node_arrays()[2], self.node_arrays()[3], self.node_arrays()[6]
+        found_query, found_pos = [], []
+        for tail_pos, d2 in self._tail_blocks(q, cutoff):
+            pair, col = np.nonzero(d2 <= bound2[:, None])
+            found_query.append(pair)
+            found_pos.append(tail_pos[col])
+
+        query = np.arange(len(q))
+        nodes = np.zeros(len(q), dtype=np.int64)
+        while len(query) > 0 and self.tree_size > 0:
+            keep = (node_min_rank[nodes] < cutoff[query]) & (self._box_dist2_many(q[query], nodes) <= bound2[query])
+            query, nodes = query[keep], nodes[keep]
+
+            leaf = node_left[nodes] < 0
+            if leaf.any():
+                d2, pos = self._leaf_distances(q, query[leaf], nodes[leaf], cutoff)
+                pair, col = np.nonzero(d2 <= bound2[query[leaf]][:, None])
+                found_query.append(query[leaf][pair])
+                found_pos.append(pos[pair, col])
+
+            query, nodes = query[~leaf], nodes[~leaf]
+            query = np.concatenate((query, query))
+            nodes = np.concatenate((node_left[nodes], node_right[nodes]))
+
+        if not found_query:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return np.concatenate(found_query), np.concatenate(found_pos)
+
+    def _tail_blocks(self, q, cutoff):
+        # Squared distances from every query to blocks of tail places, shape (queries, block), inf if not valid
+        for lo in range(self.tree_size, len(self.xyz), TAIL_BLOCK):
+            pos = np.arange(lo, min(lo + TAIL_BLOCK, len(self.xyz)))
+            diff = self.xyz[pos] - q[:, None, :]
+            d2 = (diff * diff).sum(axis=2)
+            d2[self.rank[pos] >= cutoff[:, None]] = np.inf
+            yield pos, d2
+
+    def _nearest_chunk(self, q, cutoff):
+        node_lo, node_hi, node_left, node_right, _, _, node_min_rank = self.node_arrays()
+        m = len(q)
+        all_queries = np.arange(m)
+        best = np.full(m, -1, dtype=np.int64)
+        best_d2 = np.full(m, np.inf)
+
+        for pos, d2 in self._tail_blocks(q, cutoff):
+            j = np.argmin(d2, axis=1)
+            self._update_best(best, best_d2, all_queries, d2[all_queries, j], pos[j])
+        if self.tree_size == 0:
+            return best, best_d2
+
+        # 1. Descend every query to the nearest leaf holding a valid place, to get a good first bound
+        nodes = np.zeros(m, dtype=np.int64)
+        internal = node_left[nodes] >= 0
+        while internal.any():
+            qi = all_queries[internal]
+            left, right = node_left[nodes[qi]], node_right[nodes[qi]]
+            left_ok, right_ok = node_min_rank[left] < cutoff[qi], node_min_rank[right] < cutoff[qi]
+            nearer_left = self._box_dist2_many(q[qi], left) <= self._box_dist2_many(q[qi], right)
+            go_left = left_ok & (nearer_left | ~right_ok)
+            nodes[qi] = np.where(go_left, left, right)
+            internal = node_left[nodes] >= 0
+        d2, pos = self._leaf_candidates(q, all_queries, nodes, cutoff)
+        self._update_best(best, best_d2, all_queries, d2, pos)
+
+        # 2. Breadth first search from the root of all (query, node) pairs that could still hold a nearer place
+        query = all_queries
+        nodes = np.zeros(m, dtype=np.int64)
+        while len(query) > 0:
+            keep = (node_min_rank[nodes] < cutoff[query]) & (self._box_dist2_many(q[query], nodes) < best_d2[query])
+            query, nodes = query[keep], nodes[keep]
+
+            leaf = node_left[nodes] < 0
+            if leaf.any():
+                d2, pos = self._leaf_candidates(q, query[leaf], nodes[leaf], cutoff)
+                self._update_best(best, best_d2, query[leaf], d2, pos)
+
+            query, nodes = query[~leaf], nodes[~leaf]
+            query = np.concatenate((query, query))
+            nodes = np.concatenate((node_left[nodes], node_right[nodes]))
+
+        return best, best_d2
+
+
+class NearestTracker:
+    # Nearest place to a point that moves a little between queries, giving the same answer as PlaceIndex.nearest()
+    # After a full search at anchor point A (nearest place at distance d), every place within d + 2m of A is kept.
+    # For a point Q within m of A, the nearest place N satisfies |QN| <= d + m, so |AN| <= d + 2m: N is one of
+    # the kept candidates. Until the point moves more than m from A only those few candidates are checked.
+
+    def __init__(self, index):
+        self.index = index
+        self.anchor = None          # Unit vector where the neighbourhood was last searched
+        self.cutoff = None          # Date cutoff the candidates were found for
+        self.margin_km = 0.0
+        self.cand_pos = None
+        self.cand_xyz = None
+        self.last_q = None
+        self.step_km = 0.0
+        self.searches = 0           # Full searches, for tuning
+        self.queries = 0
+
+    def nearest(self, lat, lon, on_date=None):
+        # Index (into the original list) and distance (km) of the nearest place valid on on_date
+        self.queries += 1
+        index = self.index
+        cutoff = index.date_cutoff(on_date)
+        q = to_xyz([lat], [lon])[0]
+
+        if self.last_q is not None:
+            self.step_km = float(chord2_to_km(((q - self.last_q) ** 2).sum()))
+        self.last_q = q
+
+        if self.anchor is None or cutoff != self.cutoff or \
+                chord2_to_km(((q - self.anchor) ** 2).sum()) > self.margin_km:
+            self._search(lat, lon, q, cutoff, on_date)
+
+        if len(self.cand_pos) == 0:
+            return None, None
+        d2 = ((self.cand_xyz - q) ** 2).sum(axis=1)
+        i = int(np.argmin(d2))
+        return int(index.order[self.cand_pos[i]]), float(chord2_to_km(d2[i]))
+
+    def _search(self, lat, lon, q, cutoff, on_date):
+        self.searches += 1
+        self.anchor, self.cutoff = q, cutoff
+        i, d = self.index.nearest(lat, lon, on_date)
+        if i is None:
+            self.cand_pos, self.cand_xyz = np.array([], dtype=np.int64), np.zeros((0, 3))
+            return
+
+        # Margin grows with the distance to the nearest place (sparse lists) and with the step size (fast forward)
+        self.margin_km = max(MIN_MARGIN_KM, 0.5 * d, REUSE_STEPS * self.step_km)
+        radius = d + 2 * self.margin_km + 1e-6      # Allow for rounding between km and chord lengths
+        self.cand_pos, _ = self.index.radius_positions(lat, lon, radius, cutoff)
+        self.cand_xyz = self.index.xyz[self.cand_pos]
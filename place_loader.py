@@ -0,0 +1,180 @@
+# place_loader.py
+# Load place lists from CSV files into a PlaceTable
+# Rows are streamed in chunks straight into flat arrays (never a Python object per place), so a dense grid of
+# millions of points loads with bounded memory. Blank and malformed rows are skipped and counted.
+# The parsed columns are saved as .npy files next to the CSV and memory mapped on the next load, as long as
+# the CSV's modification time and size are unchanged.
+#
+# 18-oct-2026   Created (from the CSV loader in place_table.py), streaming and memory mapped cache
+# 18-oct-2026   Cache files replaced rather than overwritten, so a reloaded file doesn't disturb mapped tables
+
+import csv
+import os
+import sys
+from itertools import islice
+
+import numpy as np
+
+from place_table import PlaceTable, StringColumn, date_ordinal, date_ordinals
+
+CACHE_SUFFIX = '.cache'         # Directory of .npy columns for a place file, e.g. capitals.csv.cache/
+CHUNK_ROWS = 100000             # Rows parsed per chunk
+PROGRESS_MIN_BYTES = 10000000   # Only report progress for files larger than this
+CACHE_COLUMNS = ('lat', 'lon', 'valid_from', 'ids_data', 'ids_offsets', 'names_data', 'names_offsets')
+
+
+class StringColumnBuilder:
+    # Appends strings to a growing UTF-8 buffer, finished off as a StringColumn
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = [np.zeros(1, dtype=np.int64)]
+
+    def extend(self, strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.offsets.append(len(self.data) + np.cumsum(lengths))
+        self.data += b''.join(encoded)
+
+    def column(self):
+        return StringColumn(np.frombuffer(bytes(self.data), dtype=np.uint8), np.concatenate(self.offsets))
+
+
+def print_progress(rows, bytes_read, total_bytes):
+    percent = 100 * bytes_read / total_bytes if total_bytes else 100
+    print(f"\rLoading places: {rows:,} rows ({percent:3.0f}%)", end='' if bytes_read < total_bytes else '\n',
+          file=sys.stderr, flush=True)
+
+
+def parse_floats(values):
+    # Float array from strings, NaN where a value isn't a number
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        floats = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                floats[i] = float(v)
+            except ValueError:
+                pass
+        return floats
+
+
+def parse_dates(values):
+    # Ordinal array from date strings, -1 where a value isn't a date
+    try:
+        return date_ordinals(values)
+    except ValueError:
+        ordinals = np.full(len(values), -1, dtype=np.int32)
+        for i, v in enumerate(values):
+            try:
+                ordinals[i] = date_ordinal(v)
+            except ValueError:
+                pass
+        return ordinals
+
+
+def parse_chunk(rows):
+    # Columns from a chunk of CSV rows (Country,Valid from Date,Capital Name,Lat,Long), skipping bad rows
+    rows = [line for line in rows if len(line) >= 5]
+    if not rows:
+        return [], [], np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int32)
+    names, dates, ids, lats, lons = list(zip(*rows))[:5]
+
+    lats, lons, valid_from = parse_floats(lats), parse_floats(lons), parse_dates(dates)
+    good = (np.abs(lats) <= 90) & (np.abs(lons) <= 180) & (valid_from >= 0)
+    if not good.all():
+        ids = [s for s, ok in zip(ids, good) if ok]
+        names = [s for s, ok in zip(names, good) if ok]
+        lats, lons, valid_from = lats[good], lons[good], valid_from[good]
+
+    return ids, names, lats, lons, valid_from
+
+
+def read_places_csv(filename, progress=None, chunk_rows=CHUNK_ROWS):
+    # Stream a place CSV (with header) into a PlaceTable. progress(rows, bytes_read, total_bytes) is called per chunk
+    total_bytes = os.path.getsize(filename)
+    rows_read = 0
+    skipped = 0
+
+    ids, names = StringColumnBuilder(), StringColumnBuilder()
+    lats, lons, valid_from = [], [], []
+
+    with open(filename, 'r', encoding='utf-8-sig', errors='replace', newline='') as csvfile:
+        csv_reader = csv.reader(csvfile, delimiter=",", quotechar='"')
+        next(csv_reader, None)  # skip the header
+        while True:
+            rows = [line for line in islice(csv_reader, chunk_rows) if line]
+            if not rows:
+                break
+            bytes_read = csvfile.buffer.tell()      # Position of the read ahead buffer, near enough for progress
+            chunk = parse_chunk(rows)
+            ids.extend(chunk[0])
+            names.extend(chunk[1])
+            lats.append(chunk[2])
+            lons.append(chunk[3])
+            valid_from.append(chunk[4])
+            rows_read += len(chunk[0])
+            skipped += len(rows) - len(chunk[0])
+            if progress:
+                progress(rows_read, min(bytes_read, total_bytes), total_bytes)
+
+    if skipped:
+        print(f"{filename}: skipped {skipped} malformed rows", file=sys.stderr)
+
+    return PlaceTable(ids.column(), names.column(), np.concatenate(lats or [np.zeros(0)]),
+                      np.concatenate(lons or [np.zeros(0)]),
+                      np.concatenate(valid_from or [np.zeros(0, dtype=np.int32)]))
+
+
+def save_array(filename, values):
+    # Written to a new file and renamed over the old one, so tables still memory mapping the old file keep it
+    tmp_name = filename + '.tmp'
+    with open(tmp_name, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_name, filename)
+
+
+def save_cache(cache_dir, source_key, table):
+    os.makedirs(cache_dir, exist_ok=True)
+    columns = {'lat': table.lat, 'lon': table.lon, 'valid_from': table.valid_from,
+               'ids_data': table.ids.data, 'ids_offsets': table.ids.offsets,
+               'names_data': table.names.data, 'names_offsets': table.names.offsets}
+    for name, values in columns.items():
+        save_array(os.path.join(cache_dir, name + '.npy'), values)
+    # Key written last, so a partly written cache is never taken as valid
+    save_array(os.path.join(cache_dir, 'source_key.npy'), source_key)
+
+
+def load_cache(cache_dir, source_key):
+    # Memory mapped table from the cache, None if missing or for a different version of the CSV
+    try:
+        if not np.array_equal(np.load(os.path.join(cache_dir, 'source_key.npy')), source_key):
+            return None
+        col = {name: np.load(os.path.join(cache_dir, name + '.npy'), mmap_mode='r') for name in CACHE_COLUMNS}
+    except (OSError, ValueError):
+        return None
+
+    return PlaceTable(StringColumn(col['ids_data'], col['ids_offsets']),
+                      StringColumn(col['names_data'], col['names_offsets']),
+                      col['lat'], col['lon'], col['valid_from'])
+
+
+def load_places_file(filename, progress=None):
+    # Place list from a CSV file, memory mapped from the cache when the CSV hasn't changed
+    file_stat = os.stat(filename)
+    source_key = np.array([file_stat.st_mtime_ns, file_stat.st_size], dtype=np.int64)
+    cache_dir = filename + CACHE_SUFFIX
+
+    table = load_cache(cache_dir, source_key)
+    if table is not None:
+        return table
+
+    if progress is None and file_stat.st_size > PROGRESS_MIN_BYTES:
+        progress = print_progress
+    table = read_places_csv(filename, progress)
+    try:
+        save_cache(cache_dir, source_key, table)
+    except OSError:
+        pass    # Cache is only an optimisation
+    return table
@@ -0,0 +1,167 @@
+# place_raster.py
+# Precomputed nearest place lookup: a lat/long grid in which each cell lists the only places that can be the
+# nearest to a point in that cell (a discretised spherical Voronoi diagram)
+# For a cell with centre c and circumradius h (the greatest distance from c to any point in the cell), whose
+# centre's nearest place is at distance d, the nearest place to any point in the cell is within d + 2h of c
+# (triangle inequality), so those places are the cell's candidates and a lookup is exact.
+# Built once per place list, date and resolution, and saved in RASTER_DIR. Finer cells have fewer candidates
+# each (faster lookups) but the grid takes more memory and disk: rows * cols cells of 4 bytes plus 28 bytes
+# per candidate.
+#
+# 18-oct-2026   Created
+
+import hashlib
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from place_index import R, to_xyz
+
+RASTER_DIR = 'place_raster'     # Saved rasters, one .npz per place list, date cutoff and resolution
+DEFAULT_RESOLUTION = 1.0        # Degrees: 64,800 cells
+BUILD_CHUNK = 8192              # Cells per batch radius query while building
+RASTER_VERSION = 1
+
+
+def grid_shape(res_deg):
+    # Rows (latitude bands from -90) and columns (longitude from -180) for a resolution in degrees
+    return int(np.ceil(180.0 / res_deg)), int(np.ceil(360.0 / res_deg))
+
+
+def cell_geometry(res_deg):
+    # Lat/long of every cell centre (row major) and each row's circumradius as an angle (radians)
+    # The farthest point of a lat/long cell from its centre is one of its corners
+    rows, cols = grid_shape(res_deg)
+    lat0 = np.minimum(-90.0 + np.arange(rows) * res_deg, 90.0)
+    lat1 = np.minimum(lat0 + res_deg, 90.0)
+    lat_c = (lat0 + lat1) / 2
+    lon_c = -180.0 + (np.arange(cols) + 0.5) * res_deg
+
+    centre = to_xyz(lat_c, np.zeros(rows))
+    corner_d2 = [((to_xyz(lat, np.full(rows, res_deg / 2)) - centre) ** 2).sum(axis=1) for lat in (lat0, lat1)]
+    radius = angle_from_chord2(np.maximum(*corner_d2))
+
+    lat_grid, lon_grid = np.meshgrid(lat_c, lon_c, indexing='ij')
+    return lat_grid.ravel(), lon_grid.ravel(), radius
+
+
+def angle_from_chord2(d2):
+    return 2 * np.arcsin(np.minimum(1.0, np.sqrt(d2) / 2))
+
+
+def chord2_from_angle(angle):
+    return (2 * np.sin(np.minimum(angle, np.pi) / 2)) ** 2
+
+
+def raster_key(table, cutoff, res_deg):
+    # Identifies the places (positions and dates), the number of them valid and the resolution
+    h = hashlib.sha1()
+    for column in (table.lat, table.lon, table.valid_from):
+        h.update(np.ascontiguousarray(column).tobytes())
+    h.update(f"{cutoff}:{res_deg!r}:{RASTER_VERSION}".encode())
+    return h.hexdigest()
+
+
+class NearestRaster:
+
+    def __init__(self, res_deg, cutoff, cell_start, cell_place, cell_xyz):
+        # cell_start[cell]:cell_start[cell + 1] are the cell's candidates, as place numbers and unit vectors
+        self.res_deg = float(res_deg)
+        self.rows, self.cols = grid_shape(self.res_deg)
+        self.cutoff = int(cutoff)
+        self.cell_start = cell_start
+        self.cell_place = cell_place
+        self.cell_xyz = cell_xyz
+        self.on_date = None     # Date (ordinal) it was loaded for, so it can be rebuilt for the same date
+        return
+
+    @classmethod
+    def build(cls, index, on_date=None, res_deg=DEFAULT_RESOLUTION):
+        # Raster for the places in a PlaceIndex valid on on_date (ordinal, None for all)
+        cutoff = index.date_cutoff(on_date)
+        lats, lons, radius = cell_geometry(res_deg)
+        rows, cols = grid_shape(res_deg)
+        n_cells = rows * cols
+
+        cell_start = np.zeros(n_cells + 1, dtype=np.int64)
+        cell_pos = []
+        if cutoff > 0:
+            dates = None if on_date is None else np.full(n_cells, on_date)
+            _, centre_km = index.nearest_many(lats, lons, dates)
+            bound2 = chord2_from_angle(centre_km / R + 2 * np.repeat(radius, cols)) + 1e-9
+            centres = to_xyz(lats, lons)
+            cutoffs = np.full(n_cells, cutoff)
+
+            counts = np.zeros(n_cells, dtype=np.int64)
+            for start in range(0, n_cells, BUILD_CHUNK):
+                end = min(start + BUILD_CHUNK, n_cells)
+                cell, pos = index.radius_pairs_many(centres[start:end], bound2[start:end], cutoffs[start:end])
+                by_cell = np.argsort(cell, kind='stable')
+                counts[start:end] = np.bincount(cell, minlength=end - start)
+                cell_pos.append(pos[by_cell])
+            np.cumsum(counts, out=cell_start[1:])
+
+        cell_pos = np.concatenate(cell_pos) if cell_pos else np.zeros(0, dtype=np.int64)
+        return cls(res_deg, cutoff, cell_start, index.order[cell_pos].astype(np.int32), index.xyz[cell_pos])
+
+    @classmethod
+    def load(cls, filename):
+        # Saved raster, None if missing or unreadable
+        try:
+            with np.load(filename) as f:
+                return cls(float(f['res_deg']), int(f['cutoff']), f['cell_start'], f['cell_place'], f['cell_xyz'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, filename):
+        # Written to a temporary file and renamed, so a partly written raster is never loaded
+        directory = os.path.dirname(filename) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, res_deg=self.res_deg, cutoff=self.cutoff, cell_start=self.cell_start,
+                         cell_place=self.cell_place, cell_xyz=self.cell_xyz)
+            os.replace(tmp_name, filename)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    @property
+    def nbytes(self):
+        return self.cell_start.nbytes + self.cell_place.nbytes + self.cell_xyz.nbytes
+
+    def cell_of(self, lat, lon):
+        row = min(max(int((lat + 90.0) // self.res_deg), 0), self.rows - 1)
+        col = int((lon + 180.0) // self.res_deg) % self.cols
+        return row * self.cols + col
+
+    def nearest(self, lat, lon):
+        # Place number and distance (km) of the nearest place, None, None if there are none
+        cell = self.cell_of(lat, lon)
+        start, end = self.cell_start[cell], self.cell_start[cell + 1]
+        if start == end:
+            return None, None
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        cos_lat = math.cos(lat_rad)
+        diff = self.cell_xyz[start:end] - (cos_lat * math.cos(lon_rad), cos_lat * math.sin(lon_rad), math.sin(lat_rad))
+        d2 = (diff * diff).sum(axis=1)
+        j = int(np.argmin(d2))
+        return int(self.cell_place[start + j]), 2 * R * math.asin(min(1.0, math.sqrt(d2[j]) / 2))
+
+
+def load_raster(table, on_date=None, res_deg=DEFAULT_RESOLUTION, raster_dir=RASTER_DIR):
+    # Raster for a PlaceTable on a date (ordinal), from raster_dir if already built, otherwise built and saved
+    cutoff = len(table) if on_date is None else table.valid_count(on_date)
+    filename = os.path.join(raster_dir, f"{raster_key(table, cutoff, res_deg)}.npz")
+    raster = NearestRaster.load(filename)
+    if raster is None:
+        raster = NearestRaster.build(table.index, on_date, res_deg)
+        try:
+            raster.save(filename)
+        except OSError:
+            pass    # Saving is only an optimisation
+    raster.on_date = on_date
+    return raster
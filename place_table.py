@@ -0,0 +1,186 @@
+# place_table.py
+# Places held as a structure of arrays: one contiguous NumPy array per column rather than a namedtuple
+# (with a nested latlong namedtuple) per place. Trig values are precomputed once, so distances to every
+# place are computed in a single vectorised expression. Indexing the table returns the familiar
+# place/latlong namedtuples, built on demand.
+#
+# 18-oct-2026   Created
+# 18-oct-2026   Places ordered by activation date, so those valid on a date are a prefix found by bisection
+# 18-oct-2026   load_places_file(): CSV place lists cached as .npz, re-read only when the CSV changes
+# 18-oct-2026   StringColumn for ids/names of large lists; CSV loading moved to place_loader.py
+# 18-oct-2026   Each table has a NearestTracker for the per tick nearest place queries
+# 18-oct-2026   Optional NearestRaster (see places.use_raster)
+# 18-oct-2026   reuse_index(): take over the index of the list's previous version when a file is reloaded
+
+from collections import namedtuple
+from datetime import date, datetime
+
+import numpy as np
+
+from place_index import R, NearestTracker, PlaceIndex
+
+latlong = namedtuple('Latlong', ['lat', 'lon'])
+place = namedtuple('Place', ['id', 'name', 'latlong', 'valid_from'])
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')     # ISO, or day/month/year as in '6/4/1896'
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+JD_ORDINAL_OFFSET = 1721424.5               # Julian date of the start of ordinal day 0
+
+
+def jd_to_ordinal(jd):
+    # Julian date (e.g. skyfield Time.ut1) to the ordinal of that (UTC) day, without building a datetime
+    return int(jd - JD_ORDINAL_OFFSET)
+
+
+def date_ordinal(value):
+    # Date (ordinal, date, datetime or string in one of DATE_FORMATS) to a proleptic Gregorian ordinal
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).toordinal()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised date '{value}'")
+
+
+def date_ordinals(values):
+    # Vectorised date_ordinal for a whole column: ISO dates are parsed by NumPy, anything else one at a time
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int32)
+    try:
+        days = np.array(values, dtype='datetime64[D]').astype(np.int64)
+        return (days + UNIX_EPOCH_ORDINAL).astype(np.int32)
+    except ValueError:
+        return np.array([date_ordinal(v) for v in values], dtype=np.int32)
+
+
+class StringColumn:
+    # Strings packed into one UTF-8 byte array with start offsets (offsets[i]:offsets[i+1] is string i)
+    # Two flat arrays rather than a Python str per row, and both can be memory mapped from .npy files
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class PlaceTable:
+
+    def __init__(self, ids, names, lats, lons, valid_from):
+        # valid_from: dates as strings/dates, or an integer array of ordinals
+        # ids/names: any sequence of strings, large lists use a StringColumn
+        self.ids = ids if isinstance(ids, StringColumn) else list(ids)
+        self.names = names if isinstance(names, StringColumn) else list(names)
+
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.lon = np.asarray(lons, dtype=np.float64)
+        self.valid_from = date_ordinals(valid_from)
+
+        # Dates as given, for the place namedtuple view (ISO dates made on demand if given as ordinals)
+        if isinstance(valid_from, np.ndarray) and np.issubdtype(valid_from.dtype, np.integer):
+            self.valid_from_text = None
+        else:
+            self.valid_from_text = [str(v) for v in valid_from]
+
+        lat_rad = np.radians(self.lat)
+        lon_rad = np.radians(self.lon)
+        self.sin_lat, self.cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+        self.sin_lon, self.cos_lon = np.sin(lon_rad), np.cos(lon_rad)
+
+        # Temporal index: place numbers in order of activation, with their dates
+        self.by_date = np.argsort(self.valid_from, kind='stable')
+        self.sorted_valid_from = self.valid_from[self.by_date]
+
+        self._index = None
+        self._tracker = None
+        self.raster = None      # NearestRaster for one date, set by places.use_raster()
+        return
+
+    @classmethod
+    def from_places(cls, place_list):
+        return cls([p.id for p in place_list], [p.name for p in place_list],
+                   [p.latlong.lat for p in place_list], [p.latlong.lon for p in place_list],
+                   [p.valid_from for p in place_list])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if self.valid_from_text is not None:
+            valid_from = self.valid_from_text[i]
+        else:
+            valid_from = date.fromordinal(int(self.valid_from[i])).isoformat()
+        return place(self.ids[i], self.names[i], latlong(float(self.lat[i]), float(self.lon[i])), valid_from)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def valid_count(self, on_date):
+        # Number of places with valid_from before on_date
+        return int(np.searchsorted(self.sorted_valid_from, date_ordinal(on_date), side='left'))
+
+    def valid_on(self, on_date):
+        # Numbers of the places valid on on_date, earliest first (a view, no copy)
+        return self.by_date[:self.valid_count(on_date)]
+
+    def xyz(self):
+        # Unit vectors, shape (n, 3)
+        return np.column_stack((self.cos_lat * self.cos_lon, self.cos_lat * self.sin_lon, self.sin_lat))
+
+    @property
+    def index(self):
+        # Spatial index, built on first use
+        if self._index is None:
+            self._index = PlaceIndex(self.xyz(), self.valid_from)
+        return self._index
+
+    def reuse_index(self, old, old_to_new):
+        # Index from an earlier version of this list (old_to_new: row in this table of each old row, -1 if gone),
+        # updated for the differences instead of built from scratch. Nothing to do if old never built one
+        if old._index is not None:
+            self._index = old._index.updated(old_to_new, self.xyz(), self.valid_from)
+        return
+
+    @property
+    def tracker(self):
+        # Incremental nearest place search for a moving point, created on first use
+        if self._tracker is None:
+            self._tracker = NearestTracker(self.index)
+        return self._tracker
+
+    def distances_km(self, lat, lon):
+        # Haversine distance from lat/long (degrees) to every place, using the precomputed sin/cos:
+        # sin^2(d/2) = (1 - cos d) / 2, with cos(a - b) = cos a cos b + sin a sin b
+        lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+        sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+        sin_lon, cos_lon = np.sin(lon_rad), np.cos(lon_rad)
+
+        cos_dlat = self.cos_lat * cos_lat + self.sin_lat * sin_lat
+        cos_dlon = self.cos_lon * cos_lon + self.sin_lon * sin_lon
+        a = (1 - cos_dlat) / 2 + self.cos_lat * cos_lat * (1 - cos_dlon) / 2
+        a = np.clip(a, 0.0, 1.0)
+        return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
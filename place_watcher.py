@@ -0,0 +1,112 @@
+# place_watcher.py
+# Reload a place list when its CSV file is edited, e.g. for a long running display wall
+# A background thread checks the file's modification time and size. When they change the file is re-read,
+# compared row by row with the list in use, and the differences (added, removed and changed places) are applied
+# to the existing search index rather than rebuilding it (see PlaceIndex.updated). Listeners are given the old
+# list, the new list and the diff, and the new list is swapped in with a single assignment.
+#
+# 18-oct-2026   Created
+# 18-oct-2026   Rasters rebuilt on reload for the date they were built for, not today
+# 18-oct-2026   Reload results kept in last_message for the display loops to show, not printed over their display
+
+import os
+import threading
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+from place_loader import load_places_file
+from place_raster import load_raster
+
+WATCH_INTERVAL = 2.0    # Seconds between checks of the file
+
+# old_to_new: new row of each old row (-1 if removed or changed), removed: old rows, added: new rows,
+# changed: number of places (id and name) both removed and added, i.e. moved or with a new date
+PlaceDiff = namedtuple('PlaceDiff', ['old_to_new', 'removed', 'added', 'changed'])
+
+
+def row_keys(table):
+    return zip(table.ids, table.names, table.lat.tolist(), table.lon.tolist(), table.valid_from.tolist())
+
+
+def diff_places(old, new):
+    # Match identical rows of two versions of a place table (duplicate rows are matched one to one)
+    new_rows = defaultdict(list)
+    for i, key in enumerate(row_keys(new)):
+        new_rows[key].append(i)
+
+    old_to_new = np.full(len(old), -1, dtype=np.int64)
+    for i, key in enumerate(row_keys(old)):
+        same = new_rows.get(key)
+        if same:
+            old_to_new[i] = same.pop()
+
+    matched = np.zeros(len(new), dtype=bool)
+    matched[old_to_new[old_to_new >= 0]] = True
+    removed = np.flatnonzero(old_to_new < 0)
+    added = np.flatnonzero(~matched)
+    changed = len({(old.ids[i], old.names[i]) for i in removed} & {(new.ids[i], new.names[i]) for i in added})
+    return PlaceDiff(old_to_new, removed, added, changed)
+
+
+def no_progress(rows, bytes_read, total_bytes):
+    pass
+
+
+def file_key(filename):
+    file_stat = os.stat(filename)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+class PlaceFileWatcher(threading.Thread):
+
+    def __init__(self, filename, table, listeners=(), interval=WATCH_INTERVAL):
+        # table: the list currently loaded from filename
+        # listeners: functions called as listener(old, new, diff) from this thread when the file has changed
+        super().__init__(name=f"PlaceFileWatcher({filename})", daemon=True)
+        self.filename = filename
+        self.table = table
+        self.listeners = list(listeners)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.key = file_key(filename)
+        self.reload_count = 0
+        self.last_message = None    # Result of the last reload (or why it failed), shown by the display loop
+        return
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+        return
+
+    def stop(self):
+        self.stop_event.set()
+
+    def check(self):
+        # Returns the diff if the file has changed, otherwise None
+        try:
+            key = file_key(self.filename)
+            if key == self.key:
+                return None
+            new = load_places_file(self.filename, progress=no_progress)     # Not printed from this thread
+        except (OSError, ValueError) as e:
+            self.last_message = f"Warning: {self.filename} not reloaded: {e}"
+            return None
+        self.key = key
+
+        old = self.table
+        diff = diff_places(old, new)
+        if len(diff.removed) == 0 and len(diff.added) == 0:
+            return diff
+
+        new.reuse_index(old, diff.old_to_new)
+        if old.raster is not None:
+            new.raster = load_raster(new, old.raster.on_date, old.raster.res_deg)     # For the same date
+
+        for listener in self.listeners:
+            listener(old, new, diff)
+        self.table = new
+        self.reload_count += 1
+        self.last_message = (f"{self.filename}: {len(diff.added) - diff.changed} added, "
+                             f"{len(diff.removed) - diff.changed} removed, {diff.changed} changed")
+        return diff
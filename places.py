@@ -1,39 +1,26 @@
 # Given a lat/long, find the nearest place from the list 
+# 18-oct-2026   Nearest place found with a spatial index (place_index.py) built once per place list
+# 18-oct-2026   Active places held in a PlaceTable (place_table.py), dates compared as ordinals
+# 18-oct-2026   on_date may be given as an ordinal, as used per frame by the map
+# 18-oct-2026   closest_places_to(): nearest places for whole arrays of positions (e.g. a ground track)
+# 18-oct-2026   k_nearest(), within_radius() and the satellite's visibility footprint
+# 18-oct-2026   CSV places loaded lazily from a binary cache instead of parsed at import
+# 18-oct-2026   Large CSV files streamed in chunks and memory mapped from the cache (place_loader.py)
+# 18-oct-2026   closest_place_to reuses the last search's neighbourhood while the location moves a little
+# 18-oct-2026   use_raster(): optional precomputed nearest place raster for closest_place_to (place_raster.py)
+# 18-oct-2026   Named place lists (PLACE_LISTS) selectable at runtime, replacing the experimental named lists
+# 18-oct-2026   Lists read from a file can be watched and reloaded when the file is edited (place_watcher.py)
 
 import math
-from collections import namedtuple
 from datetime import date
-import csv
 
-latlong = namedtuple('Latlong', ['lat', 'lon'])
-place = namedtuple('Place', ['id', 'name', 'latlong', 'valid_from'])
+import numpy as np
 
+from place_loader import load_places_file
+from place_raster import DEFAULT_RESOLUTION, load_raster
+from place_watcher import WATCH_INTERVAL, PlaceFileWatcher
+from place_table import PlaceTable, date_ordinal, date_ordinals, jd_to_ordinal, latlong, place
 
-# EXPERIMENTAL: named lists
-place_list = namedtuple('Placelist', ['Listname', 'plist'])
-
-dict1 = {'title': 'Olympics',
-         'places': [
-             place('Athens', 'Summer 1896,2004', latlong(37.9839412, 23.7283052), '6/4/1896'),
-             place('Paris', 'Summer 1900,1924,2024', latlong(48.8534951, 2.3483915), '1900-05-14'),
-         ]}
-
-list1 = place_list('Olympics', [
-            place('Athens', 'Summer 1896,2004', latlong(37.9839412, 23.7283052), '6/4/1896'),
-            place('Paris', 'Summer 1900,1924,2024', latlong(48.8534951, 2.3483915), '1900-05-14')
-])
-
-list2 = place_list('OCI', [
-    place('us-phoenix-1', 'Phoenix', latlong(33.45, -112.066667), '2016-10-20'),
-    place('us-ashburn-1', 'Ashburn', latlong(39.043611, -77.4875), '2017-05-15'),
-])
-
-list3 = list1
-list1[1].append(place('ap-tokyo-1', 'Tokyo', latlong(35.683333, 139.766667), '2019-04-30'))
-
-# END EXPERIMENTAL
-
-pass
 
 # Places are any lat/long position, the following are the locations of Oracle's cloud regions
 # Only places that have a GA date (valid_from) in the past are considered
@@ -377,34 +364,89 @@ test_places = [
     place('zero-zero', 'Nowhere', latlong(0, 0), '1900-01-01'),
 ]
 
-# EXPERIMENTAL: Read places from a CSV file
-# ====================================================================================================================
-# ====================================================================================================================
+# Places read from a CSV file, loaded on first use of places.csvplaces (see place_loader.load_places_file)
 # CSV Format:
 # Country,Valid from Date,Capital Name,Lat,Long
 PLACES_FILE = 'capitals.csv'
 # PLACES_FILE = 'grid.csv'
 
-csvplaces = []
-got_first = False
-
-with open(PLACES_FILE, 'r', encoding='utf-8') as csvfile:
-    csv_reader = csv.reader(csvfile, delimiter=",", quotechar='"')
-    next(csv_reader, None)  # skip the header
-    for line in csv_reader:
-        if len(line) != 0:
-            # City, Co
-            # untry, Lat, Long, Date
-            # print(f"{line}, {len(line)} ")
-            csvplaces.append(place(line[2], line[0], latlong(float(line[3]), float(line[4])), line[1]))
-# ====================================================================================================================
-# ====================================================================================================================
-
-# places = oci_regions
-# places = summer_olympics + winter_olympics
-places = capitals
-# places = test_places
-# places = csvplaces
+
+def __getattr__(name):
+    # Module attributes loaded lazily, so importing places doesn't read the CSV file
+    # csvplaces is the 'csv' list, so it is the reloaded version once the file has been edited (see watch_place_list)
+    if name == 'csvplaces':
+        return get_place_list('csv')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Named place lists, selected with select_place_list() (e.g. from the command line). Each entry returns the
+# list when it is first selected, so a CSV file is only read if it is used
+PLACE_LISTS = {
+    'capitals': lambda: capitals,
+    'oci': lambda: oci_regions,
+    'olympics': lambda: summer_olympics + winter_olympics,
+    'summer_olympics': lambda: summer_olympics,
+    'winter_olympics': lambda: winter_olympics,
+    'test': lambda: test_places,
+    'csv': lambda: load_places_file(PLACE_FILES['csv']),
+}
+DEFAULT_PLACE_LIST = 'capitals'
+
+# Lists read from a file, which can be watched for edits
+PLACE_FILES = {
+    'csv': PLACES_FILE,
+}
+
+# Each named list once loaded (its PlaceTable, with its own index, is built by table_for on first use)
+_place_lists = {}
+
+
+def get_place_list(name):
+    # PlaceTable for a named list
+    place_list = _place_lists.get(name)
+    if place_list is None:
+        if name not in PLACE_LISTS:
+            raise KeyError(f"Unknown place list '{name}', expected one of: {', '.join(PLACE_LISTS)}")
+        place_list = _place_lists[name] = PLACE_LISTS[name]()
+    return table_for(place_list)
+
+
+def select_place_list(name):
+    # Make a named list the one searched by closest_place_to() etc. Modules should read places.places rather
+    # than import the name, so they see the switch
+    global places, place_list_name
+    places = get_place_list(name)
+    place_list_name = name
+    return places
+
+
+def replace_place_list(name, table):
+    # Swap in a new version of a named list (e.g. reloaded from its file), as the current list if it is selected
+    global places
+    _place_lists[name] = table
+    if place_list_name == name:
+        places = table
+    return
+
+
+def watch_place_list(name=None, listeners=(), interval=WATCH_INTERVAL):
+    # Start reloading a list (default the current list) whenever its file is edited
+    # listeners are called as listener(old, new, diff) before the new version is swapped in
+    # Returns the watcher thread, or None if the list isn't read from a file
+    name = place_list_name if name is None else name
+    if name not in PLACE_FILES:
+        return None
+    watcher = PlaceFileWatcher(PLACE_FILES[name], get_place_list(name), listeners, interval)
+    watcher.listeners.append(lambda old, new, diff: replace_place_list(name, new))
+    watcher.start()
+    return watcher
+
+
+def next_place_list_name(name=None):
+    # The list after name (default the current list) in PLACE_LISTS order, for cycling through them
+    names = list(PLACE_LISTS)
+    name = place_list_name if name is None else name
+    return names[(names.index(name) + 1) % len(names)] if name in names else names[0]
 
 R = 6378.1  # Radius of Earth (km)
 
@@ -427,24 +469,104 @@ def dist_between(p1, p2):
     return distance
 
 
+# PlaceTable for each plain list of places, built on first use: id(list) -> (list, length, table)
+_tables = {}
+
+
+def table_for(place_list):
+    # Rebuilt if the list has been appended to since the table was built
+    if isinstance(place_list, PlaceTable):
+        return place_list
+    cached = _tables.get(id(place_list))
+    if cached is None or cached[0] is not place_list or cached[1] != len(place_list):
+        cached = _tables[id(place_list)] = (place_list, len(place_list), PlaceTable.from_places(place_list))
+    return cached[2]
+
+
+def index_for(place_list):
+    return table_for(place_list).index
+
+
 def closest_place_to(location, on_date=''):
     # Only check places with valid_from before the given date or today
-    # Optional: on-date
+    # Optional: on-date (date, ISO string or ordinal)
     if on_date == '':
-        on_date = date.today().strftime("%Y-%d-%d")
+        on_date = date.today()
     closest_dist_km = 99999
     closest_place = 'NOTFOUND'
 
-    for r in [p for p in places if p.valid_from < on_date]:
-        d = dist_between(r.latlong, location)
-
-        if d < closest_dist_km:
-            closest_dist_km = d
-            closest_place = r
+    table = table_for(places)
+    on_date = date_ordinal(on_date)
+    if table.raster is not None and table.raster.cutoff == table.index.date_cutoff(on_date):
+        i, d = table.raster.nearest(location.lat, location.lon)
+    else:
+        i, d = table.tracker.nearest(location.lat, location.lon, on_date)
+    if i is not None and d < closest_dist_km:
+        closest_dist_km = d
+        closest_place = table[i]
 
     return closest_place, closest_dist_km
 
 
+def use_raster(res_deg=DEFAULT_RESOLUTION, on_date='', name=None):
+    # Answer closest_place_to() from a raster of the places valid on on_date (default today), loaded from disk
+    # or built on first use. Smaller cells (res_deg) are quicker to search but take more memory
+    # Dates with a different set of valid places fall back to the spatial index. res_deg=None stops using it
+    # name: a place list from PLACE_LISTS, default the current list
+    table = table_for(places) if name is None else get_place_list(name)
+    if res_deg is None:
+        table.raster = None
+        return None
+    if on_date == '':
+        on_date = date.today()
+    table.raster = load_raster(table, date_ordinal(on_date), res_deg)
+    return table.raster
+
+
+def closest_places_to(lats, lons, on_dates=None):
+    # Batch version of closest_place_to for arrays of lat/long, e.g. a ground track or a "nearest city schedule"
+    # on_dates: None (today), a single date, or one date per position (an array of ordinals, or a list of
+    # ordinals, dates or strings)
+    # Returns arrays of indices into places (-1 if none valid) and distances (km)
+    if on_dates is None:
+        on_dates = date.today()
+    if isinstance(on_dates, (list, tuple)):
+        dates = np.asarray(on_dates)
+        on_dates = dates if np.issubdtype(dates.dtype, np.integer) else date_ordinals(on_dates)
+    if not isinstance(on_dates, np.ndarray):
+        on_dates = date_ordinal(on_dates)
+    return table_for(places).index.nearest_many(lats, lons, on_dates)
+
+
+def k_nearest(location, k, on_date=''):
+    # The k closest places to location as a list of (place, distance km), closest first
+    if on_date == '':
+        on_date = date.today()
+    table = table_for(places)
+    indices, distances = table.index.k_nearest(location.lat, location.lon, k, date_ordinal(on_date))
+    return [(table[i], float(d)) for i, d in zip(indices, distances)]
+
+
+def within_radius(location, km, on_date='', limit=None):
+    # All places within km of location as a list of (place, distance km), closest first, at most limit of them
+    if on_date == '':
+        on_date = date.today()
+    table = table_for(places)
+    indices, distances = table.index.within_radius(location.lat, location.lon, km, date_ordinal(on_date), limit)
+    return [(table[i], float(d)) for i, d in zip(indices, distances)]
+
+
+def footprint_radius_km(altitude_km, min_elevation_deg=0.0):
+    # Ground distance from the sub-satellite point to the edge of the area where the satellite is at least
+    # min_elevation_deg above the horizon (spherical Earth). For the ISS at ~420 km and 0 degrees, ~2250 km
+    elevation = math.radians(min_elevation_deg)
+    central_angle = math.acos(R * math.cos(elevation) / (R + altitude_km)) - elevation
+    return R * central_angle
+
+
+select_place_list(DEFAULT_PLACE_LIST)
+
+
 # Main for testing only
 if __name__ == '__main__':
     t_city, t_dist = closest_place_to(latlong(55, 0))
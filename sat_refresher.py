@@ -0,0 +1,95 @@
+# sat_refresher.py
+# Keep a long running tracker's satellite up to date without restarting it
+# A background thread re-checks the TLE cache on a schedule and, when a new element set is published,
+# builds the new EarthSatellite off the display loop and swaps it in with a single assignment.
+# The display loops pick up `refresher.current` at the start of each tick.
+#
+# 18-oct-2026   Created
+# 18-oct-2026   sat_at() picks the element set from the TLE history closest to the requested time
+# 18-oct-2026   Failed refreshes kept in last_error for the display loops to show, not printed over their display
+# 18-oct-2026   Only the last few satellites built from the TLE history are kept
+
+import threading
+from collections import OrderedDict
+
+from skyfield.api import EarthSatellite
+
+from get_tle import TLE, TleFetchError, get_history
+
+REFRESH_INTERVAL = 3600     # Seconds between checks of the TLE cache (the cache itself is re-fetched daily)
+HISTORY_SATS = 8            # Satellites built from the TLE history kept for reuse, most recently used
+
+
+class SatelliteRefresher(threading.Thread):
+
+    def __init__(self, tle, timescale, sat=None, interval=REFRESH_INTERVAL):
+        super().__init__(name=f"SatelliteRefresher({tle.sat_name})", daemon=True)
+        self.ts = timescale
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+        if sat is None:
+            sat = EarthSatellite(tle.line1, tle.line2, tle.sat_name, timescale)
+
+        # (tle, sat) replaced as one tuple so readers never see a TLE paired with the wrong satellite
+        self.current = (tle, sat)
+        self.last_error = None      # Why the last refresh failed, None once one succeeds
+
+        # Satellites built from the TLE history for time travel, keyed by offset in the history file, most
+        # recently used last (scrubbing through time visits many element sets, only the last few are kept)
+        self.history = get_history()
+        self.catnum = tle.line1[2:7]
+        self.history_sats = OrderedDict()
+        return
+
+    @property
+    def tle(self):
+        return self.current[0]
+
+    @property
+    def sat(self):
+        return self.current[1]
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.refresh()
+        return
+
+    def stop(self):
+        self.stop_event.set()
+
+    def sat_at(self, t):
+        # Satellite propagating from the element set whose epoch is closest to skyfield time t
+        # Falls back to the current satellite if there is no history for it
+        tle, sat = self.current
+        offset = self.history.closest_offset(self.catnum, t.ut1)
+        if offset is None:
+            return sat
+
+        history_sat = self.history_sats.get(offset)
+        if history_sat is None:
+            line1, line2 = self.history.read(offset)
+            history_sat = sat if line1 == tle.line1 else EarthSatellite(line1, line2, tle.sat_name, self.ts)
+            self.history_sats[offset] = history_sat
+            if len(self.history_sats) > HISTORY_SATS:
+                self.history_sats.popitem(last=False)
+        else:
+            self.history_sats.move_to_end(offset)
+        return history_sat
+
+    def refresh(self):
+        # Returns True if a new satellite was swapped in
+        current_tle = self.current[0]
+        try:
+            tle = TLE(current_tle.sat_name)
+        except (TleFetchError, OSError) as e:
+            self.last_error = f"TLE refresh failed: {e}"
+            return False
+        self.last_error = None if tle.fetch_error is None else f"TLE refresh failed: {tle.fetch_error}"
+
+        if not tle.is_valid() or (tle.line1, tle.line2) == (current_tle.line1, current_tle.line2):
+            return False
+
+        sat = EarthSatellite(tle.line1, tle.line2, tle.sat_name, self.ts)
+        self.current = (tle, sat)
+        return True
@@ -0,0 +1,53 @@
+# sun_table.py
+# Sun's subpoint (the point on the Earth with the sun overhead) for the map's day/night display
+# Observing the sun from the ephemeris with light-time correction takes a few milliseconds, too slow per frame.
+# The subpoint is instead computed for a table of times around the displayed time, all in one vectorised call,
+# and interpolated for each frame. The table is rebuilt around the displayed time when it runs off either end.
+#
+# 18-oct-2026   Created
+
+import numpy as np
+import skyfield.positionlib
+from skyfield.api import wgs84
+
+SPAN_DAYS = 1.0     # Table covers this long either side of the time it was built for
+STEP_MINS = 10      # Time between entries, the subpoint moves 2.5 degrees of longitude in this time
+EARTH = 399
+
+
+class SunTable:
+
+    def __init__(self, ephemeris, timescale, span_days=SPAN_DAYS, step_mins=STEP_MINS):
+        self.ephemeris = ephemeris
+        self.ts = timescale
+        self.span_days = span_days
+        self.step_days = step_mins / 1440
+        self.tt = None          # TT Julian dates of the entries
+        self.lats = None
+        self.longs = None       # Unwrapped (continuous, not limited to +/-180), so they can be interpolated
+        return
+
+    def build(self, tt):
+        # Subpoints from span_days before to span_days after TT Julian date tt
+        steps = int(np.ceil(self.span_days / self.step_days))
+        self.tt = tt + np.arange(-steps, steps + 1) * self.step_days
+        t = self.ts.tt_jd(self.tt)
+
+        # As for a single time: astrometric RA/dec of the sun, as seen from the Earth's centre at time t
+        sun_from_earth = self.ephemeris['earth'].at(t).observe(self.ephemeris['sun'])
+        ra, dec, distance = sun_from_earth.radec()
+        sun = skyfield.positionlib.position_of_radec(ra.hours, dec.degrees, t=t, center=EARTH)
+        sun_subpoint = wgs84.subpoint(sun)
+
+        self.lats = sun_subpoint.latitude.degrees
+        self.longs = np.degrees(np.unwrap(sun_subpoint.longitude.radians))
+        return
+
+    def subpoint(self, t):
+        # Latitude and longitude (degrees, -180 to 180) of the sun's subpoint at skyfield time t
+        tt = t.tt
+        if self.tt is None or not self.tt[0] <= tt <= self.tt[-1]:
+            self.build(tt)
+        lat = float(np.interp(tt, self.tt, self.lats))
+        long = float(np.interp(tt, self.tt, self.longs))
+        return lat, (long + 180.0) % 360.0 - 180.0
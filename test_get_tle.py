@@ -0,0 +1,137 @@
+# Tests for the TLE fetch layer, run against a local stand-in for the CelesTrak server (no network needed)
+# Run with: python -m pytest
+
+import http.server
+import os
+import threading
+
+import pytest
+
+import get_tle
+
+ISS_TLE = (b"ISS (ZARYA)\n"
+           b"1 25544U 98067A   20335.58619075  .00005341  00000-0  10461-3 0  9992\n"
+           b"2 25544  51.6473 245.1182 0001968  95.8013 325.6569 15.49119345257812\n")
+ETAG = '"v1"'
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    # Serves ISS_TLE, honouring If-None-Match. The first `refusals` requests are refused with `refuse_status`
+    refusals = 0
+    refuse_status = 429
+    requests_seen = []
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen.append(dict(self.headers))
+        if cls.refusals > 0:
+            cls.refusals -= 1
+            self.send_response(cls.refuse_status)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', ETAG)
+            self.send_header('Last-Modified', 'Mon, 30 Nov 2020 14:00:00 GMT')
+            self.send_header('Content-Length', str(len(ISS_TLE)))
+            self.end_headers()
+            self.wfile.write(ISS_TLE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    StandInHandler.refusals = 0
+    StandInHandler.refuse_status = 429
+    StandInHandler.requests_seen = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/stations.txt"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    return str(tmp_path / 'stations.txt')
+
+
+def test_fetch_writes_file_and_validators(server, local_file):
+    assert get_tle.fetch_tle_file(server, local_file, backoff=0)
+    with open(local_file, 'rb') as f:
+        assert f.read() == ISS_TLE
+    assert get_tle.read_meta(local_file)['etag'] == ETAG
+
+
+def test_conditional_request_not_modified(server, local_file):
+    get_tle.fetch_tle_file(server, local_file, backoff=0)
+    assert not get_tle.fetch_tle_file(server, local_file, backoff=0)
+    assert StandInHandler.requests_seen[-1].get('If-None-Match') == ETAG
+    with open(local_file, 'rb') as f:
+        assert f.read() == ISS_TLE
+
+
+def test_retries_when_rate_limited(server, local_file):
+    StandInHandler.refusals = 2
+    assert get_tle.fetch_tle_file(server, local_file, retries=3, backoff=0)
+    assert len(StandInHandler.requests_seen) == 3
+
+
+def test_failed_fetch_keeps_existing_file(server, local_file):
+    with open(local_file, 'wb') as f:
+        f.write(b"old contents\n")
+    StandInHandler.refusals = 10
+    StandInHandler.refuse_status = 503
+    with pytest.raises(get_tle.TleFetchError):
+        get_tle.fetch_tle_file(server, local_file, retries=2, backoff=0)
+    with open(local_file, 'rb') as f:
+        assert f.read() == b"old contents\n"
+    assert os.listdir(os.path.dirname(local_file)) == ['stations.txt']
+
+
+def test_refresh_reports_stale_cache(server, local_file):
+    with open(local_file, 'wb') as f:
+        f.write(ISS_TLE)
+    os.utime(local_file, (0, 0))        # Checked long ago
+    StandInHandler.refusals = 1
+    StandInHandler.refuse_status = 404
+    with pytest.raises(get_tle.StaleTleError):
+        get_tle.refresh_tle_file(server, local_file)
+    with open(local_file, 'rb') as f:
+        assert f.read() == ISS_TLE
+
+
+def test_refresh_skips_fresh_cache(server, local_file):
+    get_tle.fetch_tle_file(server, local_file, backoff=0)
+    assert not get_tle.refresh_tle_file(server, local_file)
+    assert len(StandInHandler.requests_seen) == 1
+
+
+def test_catalog_lookup_after_fetch(server, local_file):
+    get_tle.fetch_tle_file(server, local_file, backoff=0)
+    catalog = get_tle.TleCatalog(local_file)
+    assert catalog.lookup('ISS (ZARYA)')[0].startswith('1 25544U')
+    assert catalog.lookup(25544) == catalog.lookup('ISS (ZARYA)')
+    assert catalog.lookup('NOT THERE') is None
+
+
+def test_history_selects_closest_epoch(tmp_path):
+    line1 = "1 25544U 98067A   20335.58619075  .00005341  00000-0  10461-3 0  9992"
+    line2 = "2 25544  51.6473 245.1182 0001968  95.8013 325.6569 15.49119345257812"
+    history = get_tle.TleHistory(str(tmp_path / 'history.txt'))
+    for day in ('20345', '20325', '20335', '20335'):
+        history.add(line1.replace('20335', day), line2)
+
+    reloaded = get_tle.TleHistory(str(tmp_path / 'history.txt'))
+    assert len(reloaded) == 3
+    epoch = get_tle.tle_epoch_jd(line1)
+    assert reloaded.closest(25544, epoch - 6)[0][18:23] == '20325'
+    assert reloaded.closest(25544, epoch + 4)[0][18:23] == '20335'
+    assert reloaded.closest('25544', epoch + 100)[0][18:23] == '20345'
+    assert reloaded.closest(12345, epoch) is None
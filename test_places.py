@@ -0,0 +1,267 @@
+# Tests for the nearest place search, checked against a brute force haversine scan
+# Run with: python -m pytest
+
+import math
+import random
+from datetime import date
+
+import numpy as np
+import pytest
+
+import places
+from marker_grid import MarkerGrid
+from place_index import NearestTracker
+from place_raster import load_raster
+from place_watcher import PlaceFileWatcher
+from places import closest_place_to, date_ordinal, dist_between, latlong, place
+
+
+def brute_force(place_list, location, on_date):
+    valid = [p for p in place_list if p.valid_from < on_date]
+    return min(valid, key=lambda p: dist_between(p.latlong, location), default=None)
+
+
+@pytest.fixture
+def random_places():
+    rnd = random.Random(1)
+    return [place(f"p{i}", f"Place {i}", latlong(rnd.uniform(-90, 90), rnd.uniform(-180, 180)),
+                  f"{rnd.randint(1990, 2030)}-01-01") for i in range(5000)]
+
+
+def test_index_matches_brute_force(random_places):
+    index = places.index_for(random_places)
+    rnd = random.Random(2)
+    for _ in range(300):
+        location = latlong(rnd.uniform(-90, 90), rnd.uniform(-180, 180))
+        on_date = f"{rnd.randint(1990, 2031)}-06-01"
+        expected = brute_force(random_places, location, on_date)
+        i, d = index.nearest(location.lat, location.lon, date_ordinal(on_date))
+        if expected is None:
+            assert i is None
+        else:
+            assert d == pytest.approx(dist_between(expected.latlong, location), abs=1e-6)
+
+
+def test_closest_place_to_capitals():
+    closest, d = closest_place_to(latlong(51.5, -0.1), '2024-01-01')
+    assert closest.name == 'United Kingdom'
+    assert d < 5
+
+
+def test_no_valid_places(monkeypatch):
+    monkeypatch.setattr(places, 'places', places.oci_regions)
+    closest, d = closest_place_to(latlong(0, 0), '2000-01-01')
+    assert closest == 'NOTFOUND'
+
+
+def test_table_view_and_distances(random_places):
+    table = places.table_for(random_places)
+    assert table[10] == random_places[10]
+    location = latlong(12.5, -45.0)
+    distances = table.distances_km(location.lat, location.lon)
+    for i in (0, 100, 4999):
+        assert distances[i] == pytest.approx(dist_between(random_places[i].latlong, location), abs=1e-3)
+
+
+def test_valid_on_is_date_prefix():
+    table = places.table_for(places.summer_olympics)
+    valid = [table[i].id for i in table.valid_on('1905-01-01')]
+    assert valid == ['Athens', 'Paris', 'St. Louis']
+    assert table.valid_count(date_ordinal('1896-04-06')) == 0
+    assert table.valid_count('1896-04-07') == 1
+
+
+def test_batch_matches_single_queries(random_places):
+    index = places.index_for(random_places)
+    rnd = random.Random(3)
+    lats = [rnd.uniform(-90, 90) for _ in range(500)]
+    lons = [rnd.uniform(-180, 180) for _ in range(500)]
+    on_dates = [date_ordinal(f"{rnd.randint(1990, 2031)}-06-01") for _ in range(500)]
+    indices, distances = index.nearest_many(lats, lons, on_dates)
+    for lat, lon, on_date, i, d in zip(lats, lons, on_dates, indices, distances):
+        expected_i, expected_d = index.nearest(lat, lon, on_date)
+        assert i == (-1 if expected_i is None else expected_i)
+        if expected_i is not None:
+            assert d == pytest.approx(expected_d)
+
+
+def test_closest_places_to_track():
+    indices, distances = places.closest_places_to([51.5, 48.9], [-0.1, 2.3], '2024-01-01')
+    assert [places.places[i].name for i in indices] == ['United Kingdom', 'France']
+
+    # One date per position, as a list of ordinals, strings or dates
+    on_dates = ['2024-01-01', '1900-01-01']     # Nothing is valid before 1900-01-02
+    for dates in (on_dates, [date_ordinal(d) for d in on_dates], tuple(date.fromisoformat(d) for d in on_dates)):
+        indices, distances = places.closest_places_to([51.5, 48.9], [-0.1, 2.3], dates)
+        assert places.places[indices[0]].name == 'United Kingdom' and indices[1] == -1
+
+
+def test_k_nearest_and_within_radius(random_places):
+    index = places.index_for(random_places)
+    on_date = date_ordinal('2020-01-01')
+    location = latlong(40.0, 10.0)
+    valid = [(dist_between(p.latlong, location), i) for i, p in enumerate(random_places)
+             if p.valid_from < '2020-01-01']
+    valid.sort()
+
+    indices, distances = index.k_nearest(location.lat, location.lon, 5, on_date)
+    assert list(indices) == [i for d, i in valid[:5]]
+
+    indices, distances = index.within_radius(location.lat, location.lon, 1500, on_date)
+    assert list(indices) == [i for d, i in valid if d <= 1500]
+    assert all(distances <= 1500)
+
+    for limit in (0, 1, 3, 10 ** 6):
+        indices, distances = index.within_radius(location.lat, location.lon, 1500, on_date, limit)
+        assert list(indices) == [i for d, i in valid if d <= 1500][:limit]
+
+
+def test_footprint_radius():
+    assert places.footprint_radius_km(420) == pytest.approx(2250, rel=0.01)
+    assert places.footprint_radius_km(420, 10) < places.footprint_radius_km(420)
+
+
+def test_places_file_cache(tmp_path):
+    csv_file = tmp_path / 'places.csv'
+    csv_file.write_text('﻿Country,Date,Capital Name,Lat,Long\n'
+                        '"Afghanistan","1900-01-01","Kabul",34.51666667,69.183333\n\n'
+                        '"Albania","1900-01-01","Tirana",41.31666667,19.816667\n'
+                        '"Nowhere","not a date","Bad",1,2\n'
+                        '"Short","1900-01-01"\n', encoding='utf-8')
+    table = places.load_places_file(str(csv_file))
+    assert len(table) == 2
+    assert (tmp_path / 'places.csv.cache' / 'source_key.npy').exists()
+    cached = places.load_places_file(str(csv_file))
+    assert list(cached) == list(table)
+    assert cached[1] == place('Tirana', 'Albania', latlong(41.31666667, 19.816667), '1900-01-01')
+
+
+def test_tracker_matches_brute_force(random_places):
+    table = places.table_for(random_places)
+    tracker = NearestTracker(table.index)
+    on_date = date_ordinal('2015-01-01')
+    valid = [p for p in random_places if p.valid_from < '2015-01-01']
+
+    # Walk along a great circle-ish track with small steps, then a few jumps
+    lats = [40 * math.sin(i / 50) for i in range(400)] + [-60, 10, 80]
+    lons = [((i * 0.7 + 180) % 360) - 180 for i in range(400)] + [100, -20, 0]
+    for lat, lon in zip(lats, lons):
+        location = latlong(lat, lon)
+        expected = min(dist_between(p.latlong, location) for p in valid)
+        i, d = tracker.nearest(lat, lon, on_date)
+        assert dist_between(table[i].latlong, location) == pytest.approx(expected, abs=1e-6)
+    assert tracker.searches < tracker.queries / 4
+
+
+def test_raster_matches_brute_force(random_places, tmp_path):
+    table = places.table_for(random_places)
+    on_date = date_ordinal('2015-01-01')
+    valid = [p for p in random_places if p.valid_from < '2015-01-01']
+
+    raster = load_raster(table, on_date, 5.0, str(tmp_path))
+    assert raster.cutoff == len(valid)
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+
+    cached = load_raster(table, on_date, 5.0, str(tmp_path))
+    rnd = random.Random(3)
+    points = [(90, 0), (-90, 0), (0, 180), (0, -180)]
+    points += [(rnd.uniform(-90, 90), rnd.uniform(-180, 180)) for _ in range(300)]
+    for lat, lon in points:
+        location = latlong(lat, lon)
+        expected = min(dist_between(p.latlong, location) for p in valid)
+        for r in (raster, cached):
+            i, d = r.nearest(lat, lon)
+            assert dist_between(table[i].latlong, location) == pytest.approx(expected, abs=1e-6)
+
+
+def test_select_place_list():
+    assert places.place_list_name == places.DEFAULT_PLACE_LIST
+    try:
+        table = places.select_place_list('oci')
+        assert places.places is table
+        assert len(table) == len(places.oci_regions)
+        place_found, d = closest_place_to(latlong(51.5, -0.1))
+        assert place_found.id == 'uk-london-1'
+        assert places.get_place_list('oci') is table
+        assert places.next_place_list_name() == list(places.PLACE_LISTS)[2]
+        with pytest.raises(KeyError):
+            places.select_place_list('nowhere')
+    finally:
+        places.select_place_list(places.DEFAULT_PLACE_LIST)
+
+
+def test_place_file_reload(tmp_path, random_places, monkeypatch):
+    def write_csv(rows):
+        csv_file.write_text('Country,Date,Capital Name,Lat,Long\n' + ''.join(
+            f'"{p.name}","{p.valid_from}","{p.id}",{p.latlong.lat},{p.latlong.lon}\n' for p in rows))
+
+    csv_file = tmp_path / 'places.csv'
+    rows = random_places[:1000]
+    write_csv(rows)
+    table = places.load_places_file(str(csv_file))
+    monkeypatch.chdir(tmp_path)     # Rebuilt rasters are saved in the working directory
+    table.raster = load_raster(table, date_ordinal('2015-01-01'), 10.0)
+    tree_size = table.index.tree_size
+    watcher = PlaceFileWatcher(str(csv_file), table)
+    assert watcher.check() is None
+
+    # Remove some rows, move one, add a few new ones at the start
+    moved = rows[10]._replace(latlong=latlong(-rows[10].latlong.lat, rows[10].latlong.lon))
+    rows = random_places[1000:1020] + rows[:10] + [moved] + rows[11:900]
+    write_csv(rows)
+    diff = watcher.check()
+    assert (len(diff.added), len(diff.removed), diff.changed) == (21, 101, 1)
+    assert watcher.last_message.endswith('20 added, 100 removed, 1 changed')     # Shown by the display loop
+
+    new = watcher.table
+    assert new.index.tree_size == tree_size
+    assert new.raster.cutoff == new.valid_count(date_ordinal('2015-01-01'))     # Not rebuilt for today
+    write_csv(rows[:-1])
+    assert len(watcher.check().removed) == 1
+    write_csv(rows)
+    assert len(watcher.check().added) == 1
+    new = watcher.table
+    on_date = date_ordinal('2015-01-01')
+    valid = [p for p in rows if p.valid_from < '2015-01-01']
+    rnd = random.Random(4)
+    for _ in range(100):
+        location = latlong(rnd.uniform(-90, 90), rnd.uniform(-180, 180))
+        expected = min(dist_between(p.latlong, location) for p in valid)
+        i, d = new.tracker.nearest(location.lat, location.lon, on_date)
+        assert d == pytest.approx(expected, abs=1e-6)
+
+
+def test_marker_grid_clicks(random_places):
+    table = places.table_for(random_places)
+    rows = table.valid_on('2015-01-01')
+    x = ((table.lon[rows] + 180) / 360 * 1920).astype(int)
+    y = ((90 - table.lat[rows]) / 180 * 880).astype(int)
+    grid = MarkerGrid(table, rows, x, y, 8)
+
+    rnd = random.Random(5)
+    clicks = [(int(x[i]) + rnd.randint(-9, 9), int(y[i]) + rnd.randint(-9, 9)) for i in range(200)]
+    clicks += [(rnd.randrange(1920), rnd.randrange(880)) for _ in range(200)]
+    # Beyond the markers on every side: left, right, above and below them, and the corners
+    clicks += [(px, py) for px in (-5000, -1, 1920, 5000) for py in (-5000, -1, 440, 880, 5000)]
+    clicks += [(px, py) for px in (0, 960, 1919) for py in (-5000, -1, 880, 5000)]
+    for px, py in clicks:
+        # Brute force: every marker whose square (like a pygame Rect) contains the point
+        hits = np.flatnonzero((x - 8 <= px) & (px < x + 8) & (y - 8 <= py) & (py < y + 8))
+        marker = grid.at(px, py)
+        if len(hits) == 0:
+            assert marker is None
+        else:
+            assert marker in hits
+            d2 = (x[hits] - px) ** 2 + (y[hits] - py) ** 2
+            assert (x[marker] - px) ** 2 + (y[marker] - py) ** 2 == d2.min()
+            assert grid.place(marker) == random_places[rows[marker]]
+        assert set(grid.in_rect(px - 20, py - 20, px + 20, py + 20)) == \
+            set(np.flatnonzero((x - 8 < px + 20) & (px - 20 < x + 8) & (y - 8 < py + 20) & (py - 20 < y + 8)))
+
+    # Markers covering only part of the screen
+    small = MarkerGrid(None, [0, 1, 2], [100, 120, 140], [100, 110, 130], 8)
+    for px, py in [(1000, 100), (0, 100), (120, 0), (120, 1000), (1000, 1000), (-50, -50), (91, 91)]:
+        assert small.at(px, py) is None
+        assert len(small.in_rect(px, py, px + 1, py + 1)) == 0
+    assert small.at(100, 100) == 0 and small.at(147, 137) == 2
+    assert MarkerGrid(None, [], [], [], 8).at(10, 10) is None